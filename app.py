@@ -37,11 +37,6 @@ try:
 except Exception as e:
     LLM_AVAILABLE = False
 
-# PDF generation
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-
 # Page configuration
 st.set_page_config(
     page_title="AI Health Navigator",
@@ -77,6 +72,8 @@ if "data" not in st.session_state:
     }
 if "assessment_result" not in st.session_state:
     st.session_state.assessment_result = None
+if "pdf_bytes" not in st.session_state:
+    st.session_state.pdf_bytes = None
 
 def add_message(role: str, content: str):
     st.session_state.messages.append({"role": role, "content": content})
@@ -86,6 +83,7 @@ def reset():
     st.session_state.messages = []
     st.session_state.data = {"symptoms": [], "duration": "", "other_symptoms": [], "severity": "", "history": [], "name": "", "age": 30}
     st.session_state.assessment_result = None
+    st.session_state.pdf_bytes = None
 
 def run_assessment():
     """Run AI assessment using LangGraph workflow"""
@@ -464,34 +462,19 @@ This assessment is generated for **informational purposes only** and does **NOT*
         "symptoms": all_symptoms
     }
 
-def generate_pdf(assessment):
-    """Generate professional PDF report"""
-    import re
-    from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
-    from reportlab.lib.colors import HexColor, white, black
-    from reportlab.lib.units import inch
-    from reportlab.platypus import Table, TableStyle, HRFlowable, KeepTogether
-    from reportlab.lib import colors
 
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=letter,
-        topMargin=0.5*inch,
-        bottomMargin=0.75*inch,
-        leftMargin=0.75*inch,
-        rightMargin=0.75*inch
-    )
+@st.cache_resource
+def _get_pdf_styles():
+    """Build the report stylesheet once and share it across PDF renders"""
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
+    from reportlab.lib.colors import HexColor
+
     styles = getSampleStyleSheet()
 
-    # Define colors
+    # Colors shared with generate_pdf
     PRIMARY_COLOR = HexColor('#1e40af')  # Deep blue
-    SECONDARY_COLOR = HexColor('#3b82f6')  # Lighter blue
-    SUCCESS_COLOR = HexColor('#16a34a')  # Green
-    WARNING_COLOR = HexColor('#d97706')  # Amber
-    DANGER_COLOR = HexColor('#dc2626')  # Red
     GRAY_COLOR = HexColor('#6b7280')
-    LIGHT_GRAY = HexColor('#f3f4f6')
     DARK_TEXT = HexColor('#1f2937')
 
     # Custom styles
@@ -559,6 +542,43 @@ def generate_pdf(assessment):
         alignment=TA_JUSTIFY
     ))
 
+    return styles
+
+
+def generate_pdf(assessment):
+    """Generate professional PDF report"""
+    # reportlab is only needed once an assessment is complete, so keep it off the
+    # import path of every Streamlit rerun
+    import html
+    import re
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.colors import HexColor, white, black
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+    from reportlab.platypus import Table, TableStyle, HRFlowable, KeepTogether
+    from reportlab.lib import colors
+
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=letter,
+        topMargin=0.5*inch,
+        bottomMargin=0.75*inch,
+        leftMargin=0.75*inch,
+        rightMargin=0.75*inch
+    )
+    styles = _get_pdf_styles()
+
+    # Define colors
+    PRIMARY_COLOR = HexColor('#1e40af')  # Deep blue
+    SECONDARY_COLOR = HexColor('#3b82f6')  # Lighter blue
+    SUCCESS_COLOR = HexColor('#16a34a')  # Green
+    WARNING_COLOR = HexColor('#d97706')  # Amber
+    DANGER_COLOR = HexColor('#dc2626')  # Red
+    GRAY_COLOR = HexColor('#6b7280')
+    LIGHT_GRAY = HexColor('#f3f4f6')
+    DARK_TEXT = HexColor('#1f2937')
+
     elements = []
 
     # ===== HEADER SECTION =====
@@ -660,6 +680,10 @@ def generate_pdf(assessment):
         elif line.startswith('# '):
             return ('h1', line[2:].strip())
 
+        # Escape reportlab markup characters first so the tags added below are
+        # the only markup and Paragraph never has to reject a line
+        line = html.escape(line, quote=False)
+
         # Convert bold and italic
         line = re.sub(r'\*\*([^*]+)\*\*', r'<b>\1</b>', line)
         line = re.sub(r'\*([^*]+)\*', r'<i>\1</i>', line)
@@ -674,7 +698,25 @@ def generate_pdf(assessment):
 
         return ('text', line)
 
+    def add_text_block(lines, style_name):
+        """Emit consecutive lines of one style as a single Paragraph"""
+        elements.append(Paragraph('<br/>'.join(lines), styles[style_name]))
+
+    # One style shared by every section header table
+    header_style = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, -1), PRIMARY_COLOR),
+        ('TEXTCOLOR', (0, 0), (-1, -1), white),
+        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 11),
+        ('TOPPADDING', (0, 0), (-1, -1), 8),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+        ('LEFTPADDING', (0, 0), (-1, -1), 10),
+    ])
+
+    # Body and bullet lines are buffered so a long assessment becomes a few
+    # flowables instead of one per line
     current_section = []
+    current_style = None
 
     for line in assessment['full_assessment'].split('\n'):
         if not line.strip():
@@ -683,37 +725,35 @@ def generate_pdf(assessment):
         result = process_markdown_line(line)
         line_type, content = result
 
-        if line_type == 'hr':
+        if line_type == 'bullet':
+            style_name = 'BulletText'
+        elif line_type == 'text':
+            if not content.strip():
+                continue
+            style_name = 'CustomBody'
+        else:
+            style_name = None
+
+        if current_section and style_name != current_style:
+            add_text_block(current_section, current_style)
+            current_section = []
+
+        if style_name:
+            current_section.append(content)
+            current_style = style_name
+        elif line_type == 'hr':
             elements.append(HRFlowable(width="100%", thickness=0.5, color=LIGHT_GRAY, spaceBefore=10, spaceAfter=10))
         elif line_type in ('h1', 'h2', 'h3'):
             # Section header with background
             header_data = [[content.upper()]]
             header_table = Table(header_data, colWidths=[6.5*inch])
-            header_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, -1), PRIMARY_COLOR),
-                ('TEXTCOLOR', (0, 0), (-1, -1), white),
-                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 11),
-                ('TOPPADDING', (0, 0), (-1, -1), 8),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-                ('LEFTPADDING', (0, 0), (-1, -1), 10),
-            ]))
+            header_table.setStyle(header_style)
             elements.append(Spacer(1, 15))
             elements.append(header_table)
             elements.append(Spacer(1, 10))
-        elif line_type == 'bullet':
-            try:
-                elements.append(Paragraph(content, styles['BulletText']))
-            except:
-                clean = re.sub(r'<[^>]+>', '', content)
-                elements.append(Paragraph(clean, styles['BulletText']))
-        else:
-            if content.strip():
-                try:
-                    elements.append(Paragraph(content, styles['CustomBody']))
-                except:
-                    clean = re.sub(r'<[^>]+>', '', content)
-                    elements.append(Paragraph(clean, styles['CustomBody']))
+
+    if current_section:
+        add_text_block(current_section, current_style)
 
     # ===== DISCLAIMER SECTION =====
     elements.append(Spacer(1, 30))
@@ -745,7 +785,7 @@ def generate_pdf(assessment):
     elements.append(Spacer(1, 20))
     elements.append(HRFlowable(width="100%", thickness=0.5, color=GRAY_COLOR, spaceAfter=10))
 
-    footer_text = f"Generated by AI Health Navigator • {datetime.now().strftime('%B %d, %Y at %H:%M')}"
+    footer_text = f"Generated by AI Health Navigator • {report_date}"
     elements.append(Paragraph(footer_text, styles['SmallText']))
 
     doc.build(elements)
@@ -946,6 +986,7 @@ elif phase == "assessment":
     with st.spinner("Analyzing your symptoms with AI..."):
         result = run_assessment()
         st.session_state.assessment_result = result
+        st.session_state.pdf_bytes = None
         st.session_state.phase = "complete"
         st.rerun()
 
@@ -974,10 +1015,12 @@ elif phase == "complete":
             reset()
             st.rerun()
     with col2:
-        pdf = generate_pdf(result)
+        # Render once per assessment; every widget interaction reruns this page
+        if st.session_state.pdf_bytes is None:
+            st.session_state.pdf_bytes = generate_pdf(result).getvalue()
         st.download_button(
             "Download PDF",
-            data=pdf.getvalue(),
+            data=st.session_state.pdf_bytes,
             file_name=f"health_assessment_{datetime.now().strftime('%Y%m%d_%H%M')}.pdf",
             mime="application/pdf"
         )
@@ -1,5 +1,26 @@
 """Database module - Pinecone and MongoDB integrations"""
-from .pinecone_client import PineconeRAG
-from .mongodb_client import MongoDBClient, PatientRepository
+import importlib
 
-__all__ = ["PineconeRAG", "MongoDBClient", "PatientRepository"]
+# Submodules are imported on first attribute access (PEP 562) so that
+# importing database.mongodb_client does not also pull in the Pinecone SDK
+_LAZY_IMPORTS = {
+    "PineconeRAG": ".pinecone_client",
+    "MongoDBClient": ".mongodb_client",
+    "PatientRepository": ".mongodb_client",
+    "AsyncMongoDBClient": ".async_mongodb_client",
+    "AsyncPatientRepository": ".async_mongodb_client",
+}
+
+__all__ = [
+    "PineconeRAG", "MongoDBClient", "PatientRepository",
+    "AsyncMongoDBClient", "AsyncPatientRepository",
+]
+
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        module = importlib.import_module(_LAZY_IMPORTS[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,192 @@
+"""
+Async MongoDB Client for the FastAPI service
+"""
+import logging
+import os
+from functools import cached_property
+from typing import List, Dict, Any, Optional
+
+from pymongo import ASCENDING, DESCENDING, AsyncMongoClient
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.asynchronous.database import AsyncDatabase
+
+from .mongodb_client import PatientRepository, _client_options, _pool_options
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncMongoDBClient:
+    """
+    Non-blocking MongoDB client built on pymongo's AsyncMongoClient.
+    Uses the same connection string, timeouts and pool settings as MongoDBClient.
+    """
+
+    def __init__(
+        self,
+        connection_string: Optional[str] = None,
+        database_name: str = "health_navigator",
+        max_pool_size: Optional[int] = None,
+        min_pool_size: Optional[int] = None,
+        max_idle_time_ms: Optional[int] = None,
+        max_connecting: Optional[int] = None,
+        compressors: Optional[str] = None
+    ):
+        """
+        Initialize async MongoDB client.
+
+        Args:
+            connection_string: MongoDB URI (or from MONGODB_URI env)
+            database_name: Name of the database
+            max_pool_size, min_pool_size, max_idle_time_ms, max_connecting,
+            compressors: Pool and wire settings, as for MongoDBClient
+        """
+        self.connection_string = connection_string or os.getenv(
+            "MONGODB_URI",
+            "mongodb://localhost:27017"
+        )
+        self.database_name = database_name
+        self.pool_options = _pool_options(
+            max_pool_size, min_pool_size, max_idle_time_ms, max_connecting, compressors
+        )
+        self._client: Optional[AsyncMongoClient] = None
+        self._db: Optional[AsyncDatabase] = None
+
+    @property
+    def db(self) -> AsyncDatabase:
+        """Get database instance; the client connects lazily on the first operation"""
+        if self._db is None:
+            self._client = AsyncMongoClient(
+                self.connection_string, **_client_options(self.connection_string, self.pool_options)
+            )
+            self._db = self._client[self.database_name]
+        return self._db
+
+    def get_collection(self, name: str) -> AsyncCollection:
+        """Get a collection by name"""
+        return self.db[name]
+
+    async def connect(self) -> bool:
+        """
+        Establish connection to MongoDB.
+
+        Returns:
+            True if connected successfully
+        """
+        try:
+            await self.db.client.admin.command('ping')
+            logger.info(f"Connected to MongoDB (async): {self.database_name}")
+            return True
+        except Exception as e:
+            logger.error(f"MongoDB connection failed: {e}")
+            return False
+
+    async def close(self):
+        """Close the MongoDB connection"""
+        if self._client:
+            await self._client.close()
+            self._client = None
+            self._db = None
+
+
+class AsyncPatientRepository:
+    """
+    Async read paths of PatientRepository for request handlers.
+    Writes and indexes are still handled by the sync repository.
+    """
+
+    def __init__(self, mongo_client: Optional[AsyncMongoDBClient] = None):
+        self.mongo = mongo_client or AsyncMongoDBClient()
+
+    @cached_property
+    def patients(self):
+        """Get patients collection"""
+        return self.mongo.get_collection("patients")
+
+    @cached_property
+    def assessments(self):
+        """Get assessments collection"""
+        return self.mongo.get_collection("assessments")
+
+    @cached_property
+    def sessions(self):
+        """Get sessions collection"""
+        return self.mongo.get_collection("sessions")
+
+    @cached_property
+    def session_messages(self):
+        """Get session messages collection"""
+        return self.mongo.get_collection("session_messages")
+
+    async def get_patient(self, patient_id: str) -> Optional[Dict[str, Any]]:
+        """Get patient by ID"""
+        patient = await self.patients.find_one({"patient_id": patient_id})
+        if patient:
+            patient["_id"] = str(patient["_id"])
+        return patient
+
+    async def get_assessment(self, assessment_id: str) -> Optional[Dict[str, Any]]:
+        """Get assessment by ID"""
+        assessment = await self.assessments.find_one({"assessment_id": assessment_id})
+        if assessment:
+            assessment["_id"] = str(assessment["_id"])
+        return assessment
+
+    async def get_patient_assessments(
+        self,
+        patient_id: str,
+        limit: int = 20,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get all assessments for a patient.
+
+        Args:
+            patient_id: Patient identifier
+            limit: Max results
+            fields: Only return these fields (default: whole document)
+
+        Returns:
+            List of assessments
+        """
+        cursor = (
+            self.assessments
+            .find({"patient_id": patient_id}, PatientRepository._projection(fields))
+            .sort("created_at", -1)
+            .limit(limit)
+        )
+        assessments = []
+        async for a in cursor:
+            a["_id"] = str(a["_id"])
+            assessments.append(a)
+        return assessments
+
+    async def get_session(
+        self,
+        session_id: str,
+        messages_limit: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Get session by ID, with its messages oldest first.
+
+        Args:
+            session_id: Session identifier
+            messages_limit: Only return the most recent N messages
+
+        Returns:
+            Session document or None
+        """
+        projection = {"messages": {"$slice": -messages_limit}} if messages_limit else None
+        session = await self.sessions.find_one({"session_id": session_id}, projection)
+        if session:
+            session["_id"] = str(session["_id"])
+            cursor = self.session_messages.find(
+                {"session_id": session_id},
+                {"_id": 0, "session_id": 0}
+            )
+            if messages_limit:
+                recent = (await cursor.sort("seq", DESCENDING).limit(messages_limit).to_list())[::-1]
+            else:
+                recent = await cursor.sort("seq", ASCENDING).to_list()
+            messages = session.get("messages", []) + recent
+            session["messages"] = messages[-messages_limit:] if messages_limit else messages
+        return session
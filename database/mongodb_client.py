@@ -1,18 +1,82 @@
 """
 MongoDB Client for Patient Data Persistence
 """
+import copy
 import os
 import logging
-from typing import List, Dict, Any, Optional
-from datetime import datetime, timezone
+import threading
+import time
+from functools import cached_property
+from typing import List, Dict, Any, Iterator, Optional, Union
+from datetime import datetime, timedelta, timezone
 from bson import ObjectId
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
 
-from pymongo import MongoClient
+from pymongo import ASCENDING, DESCENDING, IndexModel, MongoClient, ReturnDocument, UpdateOne
 from pymongo.collection import Collection
 from pymongo.database import Database
+from pymongo.errors import OperationFailure
+from pymongo.write_concern import WriteConcern
 
 logger = logging.getLogger(__name__)
 
+# Follow-up timing by care level, in days
+_FOLLOW_UP_DAYS = {
+    "Emergency": 1,      # 24 hours
+    "Urgent Care": 3,    # 3 days
+    "Primary Care": 7,   # 1 week
+    "Self-Care": 14      # 2 weeks
+}
+
+# Wire compressor used unless MONGODB_COMPRESSORS says otherwise. zlib ships
+# with Python; zstd and snappy need optional packages, so they are opt-in
+_DEFAULT_COMPRESSORS = "zlib"
+
+
+def _pool_setting(value: Optional[int], env_var: str, default: str) -> int:
+    """Explicit argument if given (0 included), else the env var, else the default"""
+    return value if value is not None else int(os.getenv(env_var, default))
+
+
+def _pool_options(
+    max_pool_size: Optional[int] = None,
+    min_pool_size: Optional[int] = None,
+    max_idle_time_ms: Optional[int] = None,
+    max_connecting: Optional[int] = None,
+    compressors: Optional[str] = None
+) -> Dict[str, Any]:
+    """Pool and wire settings from explicit arguments, falling back to env vars"""
+    return {
+        "maxPoolSize": _pool_setting(max_pool_size, "MONGODB_MAX_POOL_SIZE", "200"),
+        "minPoolSize": _pool_setting(min_pool_size, "MONGODB_MIN_POOL_SIZE", "10"),
+        "maxIdleTimeMS": _pool_setting(max_idle_time_ms, "MONGODB_MAX_IDLE_TIME_MS", "300000"),
+        "maxConnecting": _pool_setting(max_connecting, "MONGODB_MAX_CONNECTING", "4"),
+        "retryWrites": True,
+        "compressors": compressors or os.getenv("MONGODB_COMPRESSORS") or _DEFAULT_COMPRESSORS,
+    }
+
+
+def _client_options(connection_string: str, pool_options: Dict[str, Any]) -> Dict[str, Any]:
+    """Keyword arguments shared by the sync MongoClient and the AsyncMongoClient"""
+    options = {
+        "serverSelectionTimeoutMS": 5000,
+        "connectTimeoutMS": 10000,
+        "socketTimeoutMS": 45000,
+        **pool_options,
+    }
+
+    # Add TLS options for MongoDB Atlas (Python 3.13 compatibility)
+    if "mongodb+srv" in connection_string or "mongodb.net" in connection_string:
+        try:
+            import certifi
+            options["tlsCAFile"] = certifi.where()
+        except ImportError:
+            # certifi not installed; use the system CA store
+            pass
+
+    return options
+
 
 class MongoDBClient:
     """
@@ -23,7 +87,13 @@ class MongoDBClient:
     def __init__(
         self,
         connection_string: Optional[str] = None,
-        database_name: str = "health_navigator"
+        database_name: str = "health_navigator",
+        max_pool_size: Optional[int] = None,
+        min_pool_size: Optional[int] = None,
+        max_idle_time_ms: Optional[int] = None,
+        max_connecting: Optional[int] = None,
+        compressors: Optional[str] = None,
+        create_indexes_on_connect: Optional[bool] = None
     ):
         """
         Initialize MongoDB client.
@@ -31,12 +101,26 @@ class MongoDBClient:
         Args:
             connection_string: MongoDB URI (or from MONGODB_URI env)
             database_name: Name of the database
+            max_pool_size: Max pooled connections (or MONGODB_MAX_POOL_SIZE env)
+            min_pool_size: Warm connections kept open (or MONGODB_MIN_POOL_SIZE env)
+            max_idle_time_ms: Idle time before a pooled socket is closed (or MONGODB_MAX_IDLE_TIME_MS env)
+            max_connecting: Concurrent connection handshakes (or MONGODB_MAX_CONNECTING env)
+            compressors: Wire compressors, comma separated (or MONGODB_COMPRESSORS env)
+            create_indexes_on_connect: Run ensure_indexes() on every connect (or
+                MONGODB_CREATE_INDEXES env; off by default, build them at deploy
+                time with scripts/ensure_mongodb_indexes.py)
         """
         self.connection_string = connection_string or os.getenv(
             "MONGODB_URI",
             "mongodb://localhost:27017"
         )
         self.database_name = database_name
+        self.pool_options = _pool_options(
+            max_pool_size, min_pool_size, max_idle_time_ms, max_connecting, compressors
+        )
+        if create_indexes_on_connect is None:
+            create_indexes_on_connect = os.getenv("MONGODB_CREATE_INDEXES", "false").lower() in ("1", "true", "yes")
+        self.create_indexes_on_connect = create_indexes_on_connect
         self._client: Optional[MongoClient] = None
         self._db: Optional[Database] = None
 
@@ -48,40 +132,82 @@ class MongoDBClient:
             True if connected successfully
         """
         try:
-            # Configure connection options for Atlas compatibility
-            connection_options = {
-                "serverSelectionTimeoutMS": 5000,
-                "connectTimeoutMS": 10000,
-            }
-
-            # Add TLS options for MongoDB Atlas (Python 3.13 compatibility)
-            if "mongodb+srv" in self.connection_string or "mongodb.net" in self.connection_string:
-                import certifi
-                connection_options["tlsCAFile"] = certifi.where()
-
-            self._client = MongoClient(self.connection_string, **connection_options)
+            self._client = MongoClient(
+                self.connection_string, **_client_options(self.connection_string, self.pool_options)
+            )
             self._db = self._client[self.database_name]
 
             # Test connection
             self._client.admin.command('ping')
             logger.info(f"Connected to MongoDB: {self.database_name}")
+            if self.create_indexes_on_connect:
+                self.ensure_indexes()
             return True
 
-        except ImportError:
-            # certifi not installed, try without it
-            try:
-                self._client = MongoClient(self.connection_string, serverSelectionTimeoutMS=5000)
-                self._db = self._client[self.database_name]
-                self._client.admin.command('ping')
-                logger.info(f"Connected to MongoDB: {self.database_name}")
-                return True
-            except Exception as e:
-                logger.error(f"MongoDB connection failed: {e}")
-                return False
         except Exception as e:
             logger.error(f"MongoDB connection failed: {e}")
             return False
 
+    def ensure_indexes(self) -> bool:
+        """
+        Create the indexes backing every PatientRepository filter/sort pair.
+
+        The *_id indexes are unique: once built, inserting a document with an
+        ID that already exists (e.g. a caller-supplied patient_id) raises
+        DuplicateKeyError, and the build itself fails on a collection that
+        already holds duplicates. Failures are logged per collection and never
+        raised, so the connection stays usable.
+
+        Returns:
+            True if every collection's indexes were created
+        """
+        indexes = {
+            "patients": [
+                IndexModel([("patient_id", ASCENDING)], unique=True),
+            ],
+            "assessments": [
+                IndexModel([("assessment_id", ASCENDING)], unique=True),
+                IndexModel([("patient_id", ASCENDING), ("created_at", DESCENDING)]),
+                IndexModel([("parent_assessment_id", ASCENDING), ("created_at", ASCENDING)]),
+                IndexModel([("clinical_risk_level", ASCENDING)]),
+            ],
+            "sessions": [
+                IndexModel([("session_id", ASCENDING)], unique=True),
+            ],
+            "session_messages": [
+                IndexModel([("session_id", ASCENDING), ("seq", ASCENDING)], unique=True),
+            ],
+            "appointments": [
+                IndexModel([("appointment_id", ASCENDING)], unique=True),
+                IndexModel([("patient_id", ASCENDING), ("scheduled_datetime", ASCENDING)]),
+                IndexModel([("status", ASCENDING), ("scheduled_datetime", ASCENDING)]),
+            ],
+            "medications": [
+                IndexModel([("medication_id", ASCENDING)], unique=True),
+                IndexModel([("patient_id", ASCENDING), ("is_active", ASCENDING), ("created_at", DESCENDING)]),
+            ],
+            "medication_reminders": [
+                IndexModel([("reminder_id", ASCENDING)], unique=True),
+                IndexModel([("patient_id", ASCENDING), ("scheduled_time", ASCENDING), ("status", ASCENDING)]),
+                IndexModel([("status", ASCENDING), ("scheduled_time", ASCENDING)]),
+            ],
+            "follow_up_schedules": [
+                IndexModel([("schedule_id", ASCENDING)], unique=True),
+                IndexModel([("patient_id", ASCENDING), ("scheduled_date", ASCENDING)]),
+                IndexModel([("status", ASCENDING), ("scheduled_date", ASCENDING)]),
+            ],
+        }
+
+        ok = True
+        for collection_name, models in indexes.items():
+            try:
+                self.db[collection_name].create_indexes(models)
+            except Exception as e:
+                # Missing indexes only cost performance; keep the connection usable
+                logger.warning(f"Could not create indexes on {collection_name}: {e}")
+                ok = False
+        return ok
+
     @property
     def db(self) -> Database:
         """Get database instance, connecting if needed"""
@@ -101,69 +227,136 @@ class MongoDBClient:
             self._db = None
 
 
+class _TTLCache:
+    """Small thread-safe cache whose entries expire after a fixed TTL"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: Dict[Any, tuple] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key: Any, value: Any):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            if key not in self._data and len(self._data) >= self.maxsize:
+                # Evict the oldest insertion
+                self._data.pop(next(iter(self._data)))
+            self._data[key] = (time.monotonic() + self.ttl, value)
+
+    def pop(self, key: Any):
+        with self._lock:
+            self._data.pop(key, None)
+
+
 class PatientRepository:
     """
     Repository for patient-related database operations.
     """
 
-    def __init__(self, mongo_client: Optional[MongoDBClient] = None):
+    # Point lookups (get_patient, get_assessment, ...) cached per process
+    CACHE_MAX_ENTRIES = 10_000
+
+    def __init__(self, mongo_client: Optional[MongoDBClient] = None, cache_ttl: float = 30.0):
+        """
+        Initialize the repository.
+
+        Args:
+            mongo_client: MongoDB client (a new one is created if omitted)
+            cache_ttl: Seconds a point lookup stays cached (0 disables caching)
+        """
         self.mongo = mongo_client or MongoDBClient()
-        self._patients: Optional[Collection] = None
-        self._assessments: Optional[Collection] = None
-        self._sessions: Optional[Collection] = None
-        self._appointments: Optional[Collection] = None
-        self._medications: Optional[Collection] = None
-        self._medication_reminders: Optional[Collection] = None
-        self._follow_up_schedules: Optional[Collection] = None
+        self._read_cache = _TTLCache(self.CACHE_MAX_ENTRIES, cache_ttl)
 
-    @property
+    @cached_property
     def patients(self) -> Collection:
         """Get patients collection"""
-        if self._patients is None:
-            self._patients = self.mongo.get_collection("patients")
-        return self._patients
+        return self.mongo.get_collection("patients")
 
-    @property
+    @cached_property
     def assessments(self) -> Collection:
         """Get assessments collection"""
-        if self._assessments is None:
-            self._assessments = self.mongo.get_collection("assessments")
-        return self._assessments
+        return self.mongo.get_collection("assessments")
 
-    @property
+    @cached_property
     def sessions(self) -> Collection:
         """Get sessions collection"""
-        if self._sessions is None:
-            self._sessions = self.mongo.get_collection("sessions")
-        return self._sessions
+        return self.mongo.get_collection("sessions")
 
-    @property
+    @cached_property
+    def session_messages(self) -> Collection:
+        """Get session messages collection (one document per chat message)"""
+        return self.mongo.get_collection("session_messages")
+
+    @cached_property
+    def session_messages_unacked(self) -> Collection:
+        """Get session messages collection with fire-and-forget (w=0) writes"""
+        return self.session_messages.with_options(write_concern=WriteConcern(w=0))
+
+    @cached_property
     def appointments(self) -> Collection:
         """Get appointments collection"""
-        if self._appointments is None:
-            self._appointments = self.mongo.get_collection("appointments")
-        return self._appointments
+        return self.mongo.get_collection("appointments")
 
-    @property
+    @cached_property
     def medications(self) -> Collection:
         """Get medications collection"""
-        if self._medications is None:
-            self._medications = self.mongo.get_collection("medications")
-        return self._medications
+        return self.mongo.get_collection("medications")
 
-    @property
+    @cached_property
     def medication_reminders(self) -> Collection:
         """Get medication reminders collection"""
-        if self._medication_reminders is None:
-            self._medication_reminders = self.mongo.get_collection("medication_reminders")
-        return self._medication_reminders
+        return self.mongo.get_collection("medication_reminders")
 
-    @property
+    @cached_property
     def follow_up_schedules(self) -> Collection:
         """Get follow-up schedules collection"""
-        if self._follow_up_schedules is None:
-            self._follow_up_schedules = self.mongo.get_collection("follow_up_schedules")
-        return self._follow_up_schedules
+        return self.mongo.get_collection("follow_up_schedules")
+
+    @staticmethod
+    def _projection(fields: Optional[List[str]]) -> Optional[Dict[str, int]]:
+        """Translate a field list into a find() projection (None keeps whole documents)"""
+        if not fields:
+            return None
+        return {f: 1 for f in fields}
+
+    def _find_one_cached(
+        self,
+        collection: Collection,
+        field: str,
+        value: str
+    ) -> Optional[Dict[str, Any]]:
+        """find_one by a unique ID field, served from the read cache when fresh"""
+        key = (field, value)
+        doc = self._read_cache.get(key)
+        if doc is None:
+            doc = collection.find_one({field: value})
+            if doc is None:
+                return None
+            doc["_id"] = str(doc["_id"])
+            self._read_cache.set(key, doc)
+        # Callers may mutate what they get back, nested lists and dicts
+        # included; keep the cached copy intact
+        return copy.deepcopy(doc)
+
+    @staticmethod
+    def _iter_docs(cursor) -> Iterator[Dict[str, Any]]:
+        """Stream documents from a cursor, stringifying _id as they arrive"""
+        for doc in cursor:
+            doc["_id"] = str(doc["_id"])
+            yield doc
 
     # ==================== Patient Operations ====================
 
@@ -177,10 +370,11 @@ class PatientRepository:
         Returns:
             Patient ID (string)
         """
+        now = datetime.now(timezone.utc)
         patient = {
             **patient_data,
-            "created_at": datetime.now(timezone.utc),
-            "updated_at": datetime.now(timezone.utc)
+            "created_at": now,
+            "updated_at": now
         }
 
         # Generate patient_id if not provided
@@ -202,10 +396,7 @@ class PatientRepository:
         Returns:
             Patient document or None
         """
-        patient = self.patients.find_one({"patient_id": patient_id})
-        if patient:
-            patient["_id"] = str(patient["_id"])
-        return patient
+        return self._find_one_cached(self.patients, "patient_id", patient_id)
 
     def update_patient(
         self,
@@ -229,12 +420,14 @@ class PatientRepository:
             {"$set": updates}
         )
 
+        self._read_cache.pop(("patient_id", patient_id))
         return result.modified_count > 0
 
     def search_patients(
         self,
         query: Dict[str, Any],
-        limit: int = 50
+        limit: int = 50,
+        fields: Optional[List[str]] = None
     ) -> List[Dict[str, Any]]:
         """
         Search patients by query.
@@ -242,15 +435,82 @@ class PatientRepository:
         Args:
             query: MongoDB query
             limit: Max results
+            fields: Only return these fields (default: whole document)
 
         Returns:
             List of matching patients
         """
-        patients = list(self.patients.find(query).limit(limit))
+        patients = list(self.patients.find(query, self._projection(fields)).limit(limit))
         for p in patients:
             p["_id"] = str(p["_id"])
         return patients
 
+    def get_patient_dashboard(self, patient_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a patient with recent assessments, active medications and
+        upcoming appointments in one aggregation round-trip.
+
+        Args:
+            patient_id: Patient identifier
+
+        Returns:
+            Dict with patient, assessments, medications and appointments keys,
+            or None if the patient does not exist
+        """
+        now = datetime.now(timezone.utc)
+        pipeline = [
+            {"$match": {"patient_id": patient_id}},
+            {"$limit": 1},
+            {"$lookup": {
+                "from": "assessments",
+                "localField": "patient_id",
+                "foreignField": "patient_id",
+                "pipeline": [{"$sort": {"created_at": -1}}, {"$limit": 20}],
+                "as": "assessments"
+            }},
+            {"$lookup": {
+                "from": "medications",
+                "localField": "patient_id",
+                "foreignField": "patient_id",
+                "pipeline": [
+                    {"$match": {"is_active": True}},
+                    {"$sort": {"created_at": -1}},
+                    {"$limit": 50}
+                ],
+                "as": "medications"
+            }},
+            {"$lookup": {
+                "from": "appointments",
+                "localField": "patient_id",
+                "foreignField": "patient_id",
+                "pipeline": [
+                    {"$match": {
+                        "scheduled_datetime": {"$gte": now},
+                        "status": {"$in": ["scheduled", "confirmed"]}
+                    }},
+                    {"$sort": {"scheduled_datetime": 1}},
+                    {"$limit": 20}
+                ],
+                "as": "appointments"
+            }}
+        ]
+
+        results = list(self.patients.aggregate(pipeline))
+        if not results:
+            return None
+
+        patient = results[0]
+        dashboard = {
+            key: patient.pop(key)
+            for key in ("assessments", "medications", "appointments")
+        }
+        for docs in dashboard.values():
+            for d in docs:
+                d["_id"] = str(d["_id"])
+        patient["_id"] = str(patient["_id"])
+        dashboard["patient"] = patient
+        return dashboard
+
     # ==================== Assessment Operations ====================
 
     def create_assessment(self, assessment_data: Dict[str, Any]) -> str:
@@ -276,15 +536,13 @@ class PatientRepository:
 
     def get_assessment(self, assessment_id: str) -> Optional[Dict[str, Any]]:
         """Get assessment by ID"""
-        assessment = self.assessments.find_one({"assessment_id": assessment_id})
-        if assessment:
-            assessment["_id"] = str(assessment["_id"])
-        return assessment
+        return self._find_one_cached(self.assessments, "assessment_id", assessment_id)
 
     def get_patient_assessments(
         self,
         patient_id: str,
-        limit: int = 20
+        limit: int = 20,
+        fields: Optional[List[str]] = None
     ) -> List[Dict[str, Any]]:
         """
         Get all assessments for a patient.
@@ -292,13 +550,14 @@ class PatientRepository:
         Args:
             patient_id: Patient identifier
             limit: Max results
+            fields: Only return these fields (default: whole document)
 
         Returns:
             List of assessments
         """
         assessments = list(
             self.assessments
-            .find({"patient_id": patient_id})
+            .find({"patient_id": patient_id}, self._projection(fields))
             .sort("created_at", -1)
             .limit(limit)
         )
@@ -318,56 +577,102 @@ class PatientRepository:
         Returns:
             Session ID
         """
+        now = datetime.now(timezone.utc)
         session = {
             **session_data,
             "session_id": f"SES{ObjectId()}",
-            "created_at": datetime.now(timezone.utc),
-            "updated_at": datetime.now(timezone.utc),
+            "created_at": now,
+            "updated_at": now,
             "messages": []
         }
 
         result = self.sessions.insert_one(session)
         return session["session_id"]
 
-    def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
-        """Get session by ID"""
-        session = self.sessions.find_one({"session_id": session_id})
+    def get_session(
+        self,
+        session_id: str,
+        messages_limit: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Get session by ID, with its messages oldest first.
+
+        Args:
+            session_id: Session identifier
+            messages_limit: Only return the most recent N messages
+
+        Returns:
+            Session document or None
+        """
+        # Sessions written before messages moved to their own collection
+        # may still hold them inline; those are always the oldest
+        projection = {"messages": {"$slice": -messages_limit}} if messages_limit else None
+        session = self.sessions.find_one({"session_id": session_id}, projection)
         if session:
             session["_id"] = str(session["_id"])
+            cursor = self.session_messages.find(
+                {"session_id": session_id},
+                {"_id": 0, "session_id": 0}
+            )
+            if messages_limit:
+                recent = list(cursor.sort("seq", DESCENDING).limit(messages_limit))[::-1]
+            else:
+                recent = list(cursor.sort("seq", ASCENDING))
+            messages = session.get("messages", []) + recent
+            session["messages"] = messages[-messages_limit:] if messages_limit else messages
         return session
 
     def add_message_to_session(
         self,
         session_id: str,
         role: str,
-        content: str
-    ) -> bool:
+        content: str,
+        durable: bool = True
+    ) -> Optional[bool]:
         """
         Add a message to session history.
 
+        Each message is its own document in session_messages, numbered by
+        the session's message_count, so the session document stays the same
+        size however long the chat runs and no history is dropped.
+
         Args:
             session_id: Session identifier
             role: "user" or "assistant"
             content: Message content
+            durable: Wait for the server to acknowledge the message insert;
+                pass False for fire-and-forget (w=0) appends
 
         Returns:
-            True if added
+            True if added, False if the session was not found, or None for
+            unacknowledged writes, whose outcome is unknown
         """
+        now = datetime.now(timezone.utc)
+
+        # Reserve the next sequence number; always acknowledged since the
+        # insert needs it
+        session = self.sessions.find_one_and_update(
+            {"session_id": session_id},
+            {"$inc": {"message_count": 1}, "$set": {"updated_at": now}},
+            projection={"message_count": 1, "_id": 0},
+            return_document=ReturnDocument.AFTER
+        )
+        if session is None:
+            return False
+
         message = {
+            "session_id": session_id,
+            "seq": session["message_count"],
             "role": role,
             "content": content,
-            "timestamp": datetime.now(timezone.utc)
+            "timestamp": now
         }
+        collection = self.session_messages if durable else self.session_messages_unacked
+        result = collection.insert_one(message)
 
-        result = self.sessions.update_one(
-            {"session_id": session_id},
-            {
-                "$push": {"messages": message},
-                "$set": {"updated_at": datetime.now(timezone.utc)}
-            }
-        )
-
-        return result.modified_count > 0
+        if not result.acknowledged:
+            return None
+        return True
 
     def update_session_state(
         self,
@@ -396,26 +701,55 @@ class PatientRepository:
 
         return result.modified_count > 0
 
+    def upsert_session_state(
+        self,
+        session_id: str,
+        state: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Atomically write session state and return what was stored.
+
+        Creates the session if it does not exist yet, so callers never need
+        a get_session round-trip before or after the write.
+
+        Args:
+            session_id: Session identifier
+            state: New state data
+
+        Returns:
+            The stored state
+        """
+        now = datetime.now(timezone.utc)
+        session = self.sessions.find_one_and_update(
+            {"session_id": session_id},
+            {
+                "$set": {"state": state, "updated_at": now},
+                "$setOnInsert": {"created_at": now, "messages": []}
+            },
+            projection={"state": 1, "_id": 0},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return session["state"]
+
     # ==================== Analytics Operations ====================
 
     def get_assessment_stats(self) -> Dict[str, Any]:
         """Get aggregate statistics on assessments"""
+        # Count per risk level on the server rather than pushing every
+        # level into one document, which grows without bound
         pipeline = [
             {
                 "$group": {
-                    "_id": None,
-                    "total": {"$sum": 1},
-                    "by_risk": {
-                        "$push": "$clinical_risk_level"
-                    }
+                    "_id": "$clinical_risk_level",
+                    "count": {"$sum": 1}
                 }
             }
         ]
 
-        results = list(self.assessments.aggregate(pipeline))
-        if results:
-            return results[0]
-        return {"total": 0, "by_risk": []}
+        results = list(self.assessments.aggregate(pipeline, allowDiskUse=False))
+        by_risk = {r["_id"]: r["count"] for r in results}
+        return {"total": sum(by_risk.values()), "by_risk": by_risk}
 
     # ==================== Appointment Operations ====================
 
@@ -429,12 +763,13 @@ class PatientRepository:
         Returns:
             Appointment ID (string)
         """
+        now = datetime.now(timezone.utc)
         appointment = {
             **appointment_data,
             "appointment_id": f"APT{ObjectId()}",
             "status": appointment_data.get("status", "scheduled"),
-            "created_at": datetime.now(timezone.utc),
-            "updated_at": datetime.now(timezone.utc)
+            "created_at": now,
+            "updated_at": now
         }
 
         result = self.appointments.insert_one(appointment)
@@ -481,6 +816,31 @@ class PatientRepository:
 
         return result.modified_count > 0
 
+    def bulk_update_appointment_status(
+        self,
+        appointment_ids: List[str],
+        status: str
+    ) -> int:
+        """
+        Set the status of many appointments in one round-trip.
+
+        Args:
+            appointment_ids: Appointment identifiers
+            status: New status for every appointment
+
+        Returns:
+            Number of appointments updated
+        """
+        if not appointment_ids:
+            return 0
+
+        now = datetime.now(timezone.utc)
+        ops = [
+            UpdateOne({"appointment_id": i}, {"$set": {"status": status, "updated_at": now}})
+            for i in appointment_ids
+        ]
+        return self.appointments.bulk_write(ops, ordered=False).modified_count
+
     def delete_appointment(self, appointment_id: str) -> bool:
         """
         Delete (cancel) an appointment.
@@ -498,8 +858,10 @@ class PatientRepository:
         self,
         patient_id: str,
         status: Optional[str] = None,
-        limit: int = 20
-    ) -> List[Dict[str, Any]]:
+        limit: int = 20,
+        fields: Optional[List[str]] = None,
+        as_iter: bool = False
+    ) -> Union[List[Dict[str, Any]], Iterator[Dict[str, Any]]]:
         """
         Get all appointments for a patient.
 
@@ -507,6 +869,8 @@ class PatientRepository:
             patient_id: Patient identifier
             status: Optional status filter
             limit: Max results
+            fields: Only return these fields (default: whole document)
+            as_iter: Return a generator that streams from the cursor
 
         Returns:
             List of appointments
@@ -515,20 +879,20 @@ class PatientRepository:
         if status:
             query["status"] = status
 
-        appointments = list(
+        cursor = (
             self.appointments
-            .find(query)
+            .find(query, self._projection(fields))
             .sort("scheduled_datetime", 1)
             .limit(limit)
         )
-        for a in appointments:
-            a["_id"] = str(a["_id"])
-        return appointments
+        docs = self._iter_docs(cursor)
+        return docs if as_iter else list(docs)
 
     def get_upcoming_appointments(
         self,
         days: int = 7,
-        patient_id: Optional[str] = None
+        patient_id: Optional[str] = None,
+        fields: Optional[List[str]] = None
     ) -> List[Dict[str, Any]]:
         """
         Get upcoming appointments within specified days.
@@ -536,11 +900,11 @@ class PatientRepository:
         Args:
             days: Number of days ahead to look
             patient_id: Optional patient filter
+            fields: Only return these fields (default: whole document)
 
         Returns:
             List of upcoming appointments
         """
-        from datetime import timedelta
         now = datetime.now(timezone.utc)
         end_date = now + timedelta(days=days)
 
@@ -553,7 +917,7 @@ class PatientRepository:
 
         appointments = list(
             self.appointments
-            .find(query)
+            .find(query, self._projection(fields))
             .sort("scheduled_datetime", 1)
         )
         for a in appointments:
@@ -601,12 +965,13 @@ class PatientRepository:
         Returns:
             Medication ID (string)
         """
+        now = datetime.now(timezone.utc)
         medication = {
             **medication_data,
             "medication_id": f"MED{ObjectId()}",
             "is_active": medication_data.get("is_active", True),
-            "created_at": datetime.now(timezone.utc),
-            "updated_at": datetime.now(timezone.utc)
+            "created_at": now,
+            "updated_at": now
         }
 
         result = self.medications.insert_one(medication)
@@ -616,10 +981,7 @@ class PatientRepository:
 
     def get_medication(self, medication_id: str) -> Optional[Dict[str, Any]]:
         """Get medication by ID."""
-        medication = self.medications.find_one({"medication_id": medication_id})
-        if medication:
-            medication["_id"] = str(medication["_id"])
-        return medication
+        return self._find_one_cached(self.medications, "medication_id", medication_id)
 
     def update_medication(
         self,
@@ -627,21 +989,25 @@ class PatientRepository:
         updates: Dict[str, Any]
     ) -> bool:
         """Update medication record."""
-        updates["updated_at"] = datetime.now(timezone.utc)
+        if "updated_at" not in updates:
+            updates["updated_at"] = datetime.now(timezone.utc)
 
         result = self.medications.update_one(
             {"medication_id": medication_id},
             {"$set": updates}
         )
 
+        self._read_cache.pop(("medication_id", medication_id))
         return result.modified_count > 0
 
     def get_patient_medications(
         self,
         patient_id: str,
         active_only: bool = True,
-        limit: int = 50
-    ) -> List[Dict[str, Any]]:
+        limit: int = 50,
+        fields: Optional[List[str]] = None,
+        as_iter: bool = False
+    ) -> Union[List[Dict[str, Any]], Iterator[Dict[str, Any]]]:
         """
         Get all medications for a patient.
 
@@ -649,6 +1015,8 @@ class PatientRepository:
             patient_id: Patient identifier
             active_only: Only return active medications
             limit: Max results
+            fields: Only return these fields (default: whole document)
+            as_iter: Return a generator that streams from the cursor
 
         Returns:
             List of medications
@@ -657,15 +1025,14 @@ class PatientRepository:
         if active_only:
             query["is_active"] = True
 
-        medications = list(
+        cursor = (
             self.medications
-            .find(query)
+            .find(query, self._projection(fields))
             .sort("created_at", -1)
             .limit(limit)
         )
-        for m in medications:
-            m["_id"] = str(m["_id"])
-        return medications
+        docs = self._iter_docs(cursor)
+        return docs if as_iter else list(docs)
 
     def discontinue_medication(
         self,
@@ -682,10 +1049,12 @@ class PatientRepository:
         Returns:
             True if updated
         """
+        now = datetime.now(timezone.utc)
         return self.update_medication(medication_id, {
             "is_active": False,
             "discontinued_reason": reason,
-            "discontinued_at": datetime.now(timezone.utc)
+            "discontinued_at": now,
+            "updated_at": now
         })
 
     # ==================== Medication Reminder Operations ====================
@@ -716,7 +1085,8 @@ class PatientRepository:
     def get_upcoming_reminders(
         self,
         patient_id: str,
-        hours: int = 24
+        hours: int = 24,
+        fields: Optional[List[str]] = None
     ) -> List[Dict[str, Any]]:
         """
         Get upcoming reminders for a patient within specified hours.
@@ -724,11 +1094,11 @@ class PatientRepository:
         Args:
             patient_id: Patient identifier
             hours: Hours ahead to look
+            fields: Only return these fields (default: whole document)
 
         Returns:
             List of upcoming reminders
         """
-        from datetime import timedelta
         now = datetime.now(timezone.utc)
         end_time = now + timedelta(hours=hours)
 
@@ -738,7 +1108,7 @@ class PatientRepository:
                 "patient_id": patient_id,
                 "scheduled_time": {"$gte": now, "$lte": end_time},
                 "status": "pending"
-            })
+            }, self._projection(fields))
             .sort("scheduled_time", 1)
         )
         for r in reminders:
@@ -747,13 +1117,15 @@ class PatientRepository:
 
     def get_overdue_reminders(
         self,
-        patient_id: Optional[str] = None
+        patient_id: Optional[str] = None,
+        fields: Optional[List[str]] = None
     ) -> List[Dict[str, Any]]:
         """
         Get overdue reminders.
 
         Args:
             patient_id: Optional patient filter
+            fields: Only return these fields (default: whole document)
 
         Returns:
             List of overdue reminders
@@ -768,13 +1140,41 @@ class PatientRepository:
 
         reminders = list(
             self.medication_reminders
-            .find(query)
+            .find(query, self._projection(fields))
             .sort("scheduled_time", 1)
         )
         for r in reminders:
             r["_id"] = str(r["_id"])
         return reminders
 
+    def iter_overdue_reminders(
+        self,
+        patient_id: Optional[str] = None
+    ) -> Iterator[RawBSONDocument]:
+        """
+        Stream overdue reminders without decoding them up front.
+
+        Each RawBSONDocument only decodes when a field is read, so sweeps
+        over large backlogs that touch a few fields skip the rest.
+
+        Args:
+            patient_id: Optional patient filter
+
+        Returns:
+            Iterator of raw reminder documents (_id stays an ObjectId)
+        """
+        query = {
+            "scheduled_time": {"$lt": datetime.now(timezone.utc)},
+            "status": "pending"
+        }
+        if patient_id:
+            query["patient_id"] = patient_id
+
+        raw_reminders = self.medication_reminders.with_options(
+            codec_options=CodecOptions(document_class=RawBSONDocument)
+        )
+        yield from raw_reminders.find(query).sort("scheduled_time", 1)
+
     def acknowledge_reminder(self, reminder_id: str) -> bool:
         """
         Acknowledge a reminder.
@@ -794,6 +1194,26 @@ class PatientRepository:
         )
         return result.modified_count > 0
 
+    def bulk_acknowledge_reminders(self, reminder_ids: List[str]) -> int:
+        """
+        Acknowledge many reminders in one round-trip.
+
+        Args:
+            reminder_ids: Reminder identifiers
+
+        Returns:
+            Number of reminders acknowledged
+        """
+        if not reminder_ids:
+            return 0
+
+        now = datetime.now(timezone.utc)
+        ops = [
+            UpdateOne({"reminder_id": i}, {"$set": {"status": "acknowledged", "acknowledged_at": now}})
+            for i in reminder_ids
+        ]
+        return self.medication_reminders.bulk_write(ops, ordered=False).modified_count
+
     def generate_reminders_for_medication(
         self,
         medication_id: str,
@@ -809,17 +1229,16 @@ class PatientRepository:
         Returns:
             List of created reminder IDs
         """
-        from datetime import timedelta
-
         medication = self.get_medication(medication_id)
         if not medication or not medication.get("is_active"):
             return []
 
         specific_times = medication.get("specific_times", ["09:00"])
         patient_id = medication.get("patient_id")
-        reminder_ids = []
+        reminders = []
 
-        today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        now = datetime.now(timezone.utc)
+        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
 
         for day_offset in range(days):
             reminder_date = today + timedelta(days=day_offset)
@@ -830,21 +1249,31 @@ class PatientRepository:
                     scheduled_time = reminder_date.replace(hour=hour, minute=minute)
 
                     # Only create future reminders
-                    if scheduled_time > datetime.now(timezone.utc):
-                        reminder_id = self.create_reminder({
+                    if scheduled_time > now:
+                        reminders.append({
                             "medication_id": medication_id,
                             "patient_id": patient_id,
                             "scheduled_time": scheduled_time,
                             "reminder_type": "dose",
                             "medication_name": medication.get("name"),
                             "dosage": medication.get("dosage"),
-                            "instructions": medication.get("instructions")
+                            "instructions": medication.get("instructions"),
+                            "reminder_id": f"REM{ObjectId()}",
+                            "status": "pending",
+                            "email_sent": False,
+                            "created_at": now
                         })
-                        reminder_ids.append(reminder_id)
                 except (ValueError, TypeError):
                     continue
 
-        return reminder_ids
+        if not reminders:
+            return []
+
+        # One round-trip for the whole schedule instead of one insert per dose
+        self.medication_reminders.insert_many(reminders, ordered=False)
+        logger.info(f"Created {len(reminders)} reminders for medication: {medication_id}")
+
+        return [r["reminder_id"] for r in reminders]
 
     # ==================== Follow-up Tracking Operations ====================
 
@@ -858,12 +1287,13 @@ class PatientRepository:
         Returns:
             Schedule ID (string)
         """
+        now = datetime.now(timezone.utc)
         schedule = {
             **schedule_data,
             "schedule_id": f"FUS{ObjectId()}",
             "status": schedule_data.get("status", "pending"),
-            "created_at": datetime.now(timezone.utc),
-            "updated_at": datetime.now(timezone.utc)
+            "created_at": now,
+            "updated_at": now
         }
 
         result = self.follow_up_schedules.insert_one(schedule)
@@ -873,10 +1303,7 @@ class PatientRepository:
 
     def get_follow_up_schedule(self, schedule_id: str) -> Optional[Dict[str, Any]]:
         """Get follow-up schedule by ID."""
-        schedule = self.follow_up_schedules.find_one({"schedule_id": schedule_id})
-        if schedule:
-            schedule["_id"] = str(schedule["_id"])
-        return schedule
+        return self._find_one_cached(self.follow_up_schedules, "schedule_id", schedule_id)
 
     def update_follow_up_schedule(
         self,
@@ -884,20 +1311,23 @@ class PatientRepository:
         updates: Dict[str, Any]
     ) -> bool:
         """Update follow-up schedule."""
-        updates["updated_at"] = datetime.now(timezone.utc)
+        if "updated_at" not in updates:
+            updates["updated_at"] = datetime.now(timezone.utc)
 
         result = self.follow_up_schedules.update_one(
             {"schedule_id": schedule_id},
             {"$set": updates}
         )
 
+        self._read_cache.pop(("schedule_id", schedule_id))
         return result.modified_count > 0
 
     def get_patient_follow_ups(
         self,
         patient_id: str,
         status: Optional[str] = None,
-        limit: int = 20
+        limit: int = 20,
+        fields: Optional[List[str]] = None
     ) -> List[Dict[str, Any]]:
         """
         Get all follow-up schedules for a patient.
@@ -906,6 +1336,7 @@ class PatientRepository:
             patient_id: Patient identifier
             status: Optional status filter
             limit: Max results
+            fields: Only return these fields (default: whole document)
 
         Returns:
             List of follow-up schedules
@@ -916,7 +1347,7 @@ class PatientRepository:
 
         schedules = list(
             self.follow_up_schedules
-            .find(query)
+            .find(query, self._projection(fields))
             .sort("scheduled_date", 1)
             .limit(limit)
         )
@@ -939,7 +1370,6 @@ class PatientRepository:
         Returns:
             List of pending follow-ups
         """
-        from datetime import timedelta
         now = datetime.now(timezone.utc)
         end_date = now + timedelta(days=days)
 
@@ -1004,12 +1434,42 @@ class PatientRepository:
         Returns:
             True if updated
         """
+        now = datetime.now(timezone.utc)
         return self.update_follow_up_schedule(schedule_id, {
             "status": "completed",
             "completed_assessment_id": completed_assessment_id,
-            "completed_at": datetime.now(timezone.utc)
+            "completed_at": now,
+            "updated_at": now
         })
 
+    def bulk_complete_follow_ups(self, completions: Dict[str, str]) -> int:
+        """
+        Mark many follow-ups as completed in one round-trip.
+
+        Args:
+            completions: Mapping of schedule ID to completed assessment ID
+
+        Returns:
+            Number of follow-ups updated
+        """
+        if not completions:
+            return 0
+
+        now = datetime.now(timezone.utc)
+        ops = [
+            UpdateOne({"schedule_id": schedule_id}, {"$set": {
+                "status": "completed",
+                "completed_assessment_id": assessment_id,
+                "completed_at": now,
+                "updated_at": now
+            }})
+            for schedule_id, assessment_id in completions.items()
+        ]
+        result = self.follow_up_schedules.bulk_write(ops, ordered=False)
+        for schedule_id in completions:
+            self._read_cache.pop(("schedule_id", schedule_id))
+        return result.modified_count
+
     def link_assessments(
         self,
         original_assessment_id: str,
@@ -1034,6 +1494,7 @@ class PatientRepository:
                 "updated_at": datetime.now(timezone.utc)
             }}
         )
+        self._read_cache.pop(("assessment_id", follow_up_assessment_id))
         return result.modified_count > 0
 
     def get_assessment_chain(
@@ -1049,58 +1510,105 @@ class PatientRepository:
         Returns:
             List of linked assessments in chronological order
         """
-        # First, find the root assessment
-        assessment = self.get_assessment(assessment_id)
+        # Resolve ancestors, the root, and every follow-up of the root in a
+        # single server-side pipeline instead of one query per hop
+        pipeline = [
+            {"$match": {"assessment_id": assessment_id}},
+            {"$graphLookup": {
+                "from": "assessments",
+                "startWith": "$parent_assessment_id",
+                "connectFromField": "parent_assessment_id",
+                "connectToField": "assessment_id",
+                "as": "ancestors",
+                "depthField": "depth"
+            }},
+            {"$addFields": {
+                "root": {"$reduce": {
+                    "input": "$ancestors",
+                    "initialValue": "$$ROOT",
+                    "in": {"$cond": [
+                        {"$gt": ["$$this.depth", {"$ifNull": ["$$value.depth", -1]}]},
+                        "$$this",
+                        "$$value"
+                    ]}
+                }}
+            }},
+            {"$graphLookup": {
+                "from": "assessments",
+                "startWith": "$root.assessment_id",
+                "connectFromField": "assessment_id",
+                "connectToField": "parent_assessment_id",
+                "as": "follow_ups"
+            }},
+            {"$project": {"root": 1, "follow_ups": 1}}
+        ]
+
+        try:
+            results = list(self.assessments.aggregate(pipeline))
+        except OperationFailure as e:
+            # e.g. Amazon DocumentDB, which has no $graphLookup
+            logger.warning(f"$graphLookup unavailable, walking assessment chain: {e}")
+            return self._get_assessment_chain_bfs(assessment_id)
+
+        if not results:
+            return []
+
+        root = results[0]["root"]
+        for key in ("ancestors", "depth"):
+            root.pop(key, None)
+
+        chain = [root] + sorted(results[0]["follow_ups"], key=lambda a: a["created_at"])
+        for a in chain:
+            a["_id"] = str(a["_id"])
+        return chain
+
+    def _get_assessment_chain_bfs(self, assessment_id: str) -> List[Dict[str, Any]]:
+        """Client-side chain walk issuing one $in query per tree level."""
+        # Walking up only needs the link fields; the full root document is
+        # fetched together with the first level of follow-ups below
+        link_fields = {"_id": 0, "assessment_id": 1, "parent_assessment_id": 1}
+        assessment = self.assessments.find_one({"assessment_id": assessment_id}, link_fields)
         if not assessment:
             return []
 
         # Walk up to find the root
-        while assessment.get("parent_assessment_id"):
-            parent = self.get_assessment(assessment["parent_assessment_id"])
-            if parent:
-                assessment = parent
-            else:
+        seen = {assessment_id}
+        parent_id = assessment.get("parent_assessment_id")
+        while parent_id and parent_id not in seen:
+            parent = self.assessments.find_one({"assessment_id": parent_id}, link_fields)
+            if not parent:
                 break
+            seen.add(parent_id)
+            assessment = parent
+            parent_id = assessment.get("parent_assessment_id")
 
+        # Collect every follow-up breadth-first, one level per query
         root_id = assessment["assessment_id"]
+        root = None
+        visited = {root_id}
+        frontier = [root_id]
+        query = {"$or": [{"assessment_id": root_id}, {"parent_assessment_id": {"$in": frontier}}]}
+        follow_ups = []
+        while frontier:
+            children = []
+            for doc in self.assessments.find(query):
+                if doc["assessment_id"] == root_id:
+                    root = doc
+                elif doc["assessment_id"] not in visited:
+                    children.append(doc)
+            frontier = [c["assessment_id"] for c in children]
+            visited.update(frontier)
+            follow_ups.extend(children)
+            query = {"parent_assessment_id": {"$in": frontier}}
+
+        if root is None:
+            return []
 
-        # Now get all assessments in the chain
-        chain = [assessment]
-
-        # Find all follow-ups
-        follow_ups = list(
-            self.assessments
-            .find({"parent_assessment_id": root_id})
-            .sort("created_at", 1)
-        )
-
-        for fu in follow_ups:
-            fu["_id"] = str(fu["_id"])
-            chain.append(fu)
-
-            # Find nested follow-ups (recursive)
-            nested = self._get_nested_follow_ups(fu["assessment_id"])
-            chain.extend(nested)
-
+        chain = [root] + sorted(follow_ups, key=lambda a: a["created_at"])
+        for a in chain:
+            a["_id"] = str(a["_id"])
         return chain
 
-    def _get_nested_follow_ups(self, parent_id: str) -> List[Dict[str, Any]]:
-        """Helper to get nested follow-up assessments."""
-        follow_ups = list(
-            self.assessments
-            .find({"parent_assessment_id": parent_id})
-            .sort("created_at", 1)
-        )
-
-        result = []
-        for fu in follow_ups:
-            fu["_id"] = str(fu["_id"])
-            result.append(fu)
-            # Recursive call for deeper nesting
-            result.extend(self._get_nested_follow_ups(fu["assessment_id"]))
-
-        return result
-
     def auto_create_follow_up(
         self,
         assessment_id: str,
@@ -1116,21 +1624,12 @@ class PatientRepository:
         Returns:
             Created schedule ID or None
         """
-        from datetime import timedelta
-
         assessment = self.get_assessment(assessment_id)
         if not assessment:
             return None
 
         # Determine follow-up timing based on care level
-        follow_up_days = {
-            "Emergency": 1,      # 24 hours
-            "Urgent Care": 3,    # 3 days
-            "Primary Care": 7,   # 1 week
-            "Self-Care": 14      # 2 weeks
-        }
-
-        days = follow_up_days.get(care_level, 14)
+        days = _FOLLOW_UP_DAYS.get(care_level, 14)
         scheduled_date = datetime.now(timezone.utc) + timedelta(days=days)
 
         schedule_id = self.create_follow_up_schedule({
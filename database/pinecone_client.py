@@ -3,14 +3,182 @@ Pinecone Vector Database Client for Medical Knowledge RAG
 """
 import os
 import logging
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+import weakref
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
 from typing import List, Dict, Any, Optional
 import json
 
-from pinecone import Pinecone, ServerlessSpec
+import numpy as np
+from pinecone import NotFoundException, Pinecone, ServerlessSpec
 import boto3
 
 logger = logging.getLogger(__name__)
 
+# orjson decodes Bedrock's 1024-float responses ~10x faster; stdlib json otherwise
+try:
+    import orjson
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+except ImportError:
+    _json_dumps = json.dumps
+    _json_loads = json.loads
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+class _EmbeddingCache:
+    """
+    Content-addressed embedding cache: an in-memory LRU in front of an
+    optional sqlite file, keyed by SHA-256 of model ID + text.
+    """
+
+    def __init__(self, capacity: int, path: Optional[str] = None):
+        self.capacity = capacity
+        self.path = path
+        self._memory: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _get_db(self) -> Optional[sqlite3.Connection]:
+        """Open the sqlite file on first use; disable disk caching if that fails"""
+        if self._db is None and self.path:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                self._db = sqlite3.connect(self.path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings (sha256 BLOB PRIMARY KEY, vec BLOB)"
+                )
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"Embedding disk cache disabled: {e}")
+                self.path = None
+                self._db = None
+        return self._db
+
+    def get(self, key: bytes) -> Optional[np.ndarray]:
+        with self._lock:
+            vec = self._memory.get(key)
+            if vec is not None:
+                self._memory.move_to_end(key)
+                return vec
+            db = self._get_db()
+            if db is None:
+                return None
+            try:
+                row = db.execute("SELECT vec FROM embeddings WHERE sha256 = ?", (key,)).fetchone()
+            except sqlite3.Error as e:
+                logger.warning(f"Embedding disk cache read failed: {e}")
+                return None
+            if row is None:
+                return None
+            vec = np.frombuffer(row[0], dtype=np.float32)
+            self._remember(key, vec)
+            return vec
+
+    def set(self, key: bytes, vec: np.ndarray):
+        with self._lock:
+            self._remember(key, vec)
+            db = self._get_db()
+            if db is None:
+                return
+            try:
+                db.execute(
+                    "INSERT OR REPLACE INTO embeddings (sha256, vec) VALUES (?, ?)",
+                    (key, vec.tobytes())
+                )
+                db.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Embedding disk cache write failed: {e}")
+
+    def reset_after_fork(self):
+        """Reopen the sqlite file in a forked child instead of sharing the parent's handle"""
+        self._db = None
+        self._lock = threading.Lock()
+
+    def _remember(self, key: bytes, vec: np.ndarray):
+        # Cached vectors are shared between callers, so keep them read-only
+        vec.setflags(write=False)
+        self._memory[key] = vec
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.capacity:
+            self._memory.popitem(last=False)
+
+
+class _SemanticQueryCache:
+    """
+    Ring buffer of recent query embeddings and their results. A new query
+    whose cosine similarity to a cached one exceeds the threshold reuses
+    those results instead of querying Pinecone again. Entries expire
+    after ttl seconds.
+    """
+
+    def __init__(self, dimension: int, capacity: int = 512, threshold: float = 0.95, ttl: float = 600.0):
+        self.threshold = threshold
+        self.ttl = ttl
+        self._vecs = np.zeros((capacity, dimension), dtype=np.float32)
+        self._stamps = np.full(capacity, -np.inf)
+        self._top_ks = np.zeros(capacity, dtype=np.int64)
+        self._entries: List[Optional[tuple]] = [None] * capacity
+        self._size = 0
+        self._next = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(vec: np.ndarray) -> Optional[np.ndarray]:
+        norm = np.linalg.norm(vec)
+        # Zero vectors come from failed embeddings; never match or cache them
+        return vec / norm if norm > 0 else None
+
+    def get(self, vec: np.ndarray, top_k: int) -> Optional[List[Dict[str, Any]]]:
+        q = self._normalize(vec)
+        if q is None:
+            return None
+        with self._lock:
+            if self._size == 0:
+                return None
+            # Only live entries that hold at least top_k results can answer
+            usable = (
+                (self._stamps[:self._size] >= time.monotonic() - self.ttl)
+                & (self._top_ks[:self._size] >= top_k)
+            )
+            scores = np.where(usable, self._vecs[:self._size] @ q, -np.inf)
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                return None
+            _, results = self._entries[best]
+            return [dict(r) for r in results[:top_k]]
+
+    def add(self, vec: np.ndarray, top_k: int, results: List[Dict[str, Any]]):
+        q = self._normalize(vec)
+        if q is None:
+            return
+        with self._lock:
+            now = time.monotonic()
+            # Release results of expired slots; -inf keeps them from ever matching
+            for i in np.flatnonzero(self._stamps[:self._size] < now - self.ttl):
+                self._entries[i] = None
+                self._stamps[i] = -np.inf
+            self._vecs[self._next] = q
+            self._stamps[self._next] = now
+            self._top_ks[self._next] = top_k
+            self._entries[self._next] = (top_k, [dict(r) for r in results])
+            self._next = (self._next + 1) % len(self._entries)
+            self._size = min(self._size + 1, len(self._entries))
+
+    def clear(self):
+        """Drop every cached query, e.g. after the index contents change"""
+        with self._lock:
+            self._stamps[:] = -np.inf
+            self._entries = [None] * len(self._entries)
+            self._size = 0
+            self._next = 0
+
 
 class PineconeRAG:
     """
@@ -18,6 +186,8 @@ class PineconeRAG:
     Uses AWS Bedrock for embeddings.
     """
 
+    EMBEDDING_MODEL_ID = "amazon.titan-embed-text-v1"
+
     def __init__(
         self,
         api_key: Optional[str] = None,
@@ -42,9 +212,19 @@ class PineconeRAG:
         self._pc: Optional[Pinecone] = None
         self._index = None
         self._bedrock = None
+        self._client_lock = threading.Lock()
+
+        # Embedding cache (EMBEDDING_CACHE_ENABLED=false turns it off). Keys are
+        # derived from patient query text, so it stays in memory unless
+        # EMBEDDING_CACHE_PATH opts in to an on-disk sqlite layer
+        self._embedding_cache: Optional[_EmbeddingCache] = None
+        if os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() not in ("0", "false", "no"):
+            self._embedding_cache = _EmbeddingCache(
+                capacity=int(os.getenv("EMBEDDING_CACHE_CAPACITY", "10000")),
+                path=os.getenv("EMBEDDING_CACHE_PATH") or None
+            )
 
-        # Medical knowledge base for seeding
-        self.medical_knowledge = self._load_medical_knowledge()
+        _instances.add(self)
 
     def _get_pinecone(self) -> Pinecone:
         """Get or create Pinecone client"""
@@ -52,19 +232,37 @@ class PineconeRAG:
             if not self.api_key:
                 logger.warning("Pinecone API key not set, using fallback mode")
                 return None
-            self._pc = Pinecone(api_key=self.api_key)
+            with self._client_lock:
+                if self._pc is None:
+                    self._pc = Pinecone(api_key=self.api_key)
         return self._pc
 
     def _get_bedrock(self):
         """Get Bedrock client for embeddings"""
         if self._bedrock is None:
-            self._bedrock = boto3.client(
-                "bedrock-runtime",
-                region_name=self.region
-            )
+            with self._client_lock:
+                if self._bedrock is None:
+                    self._bedrock = boto3.client(
+                        "bedrock-runtime",
+                        region_name=self.region
+                    )
         return self._bedrock
 
-    def _get_embedding(self, text: str) -> List[float]:
+    def _reset_clients(self):
+        """
+        Drop network clients inherited across fork(); they share sockets
+        and pool threads with the parent. Each process reconnects lazily.
+        """
+        self._client_lock = threading.Lock()
+        self._pc = None
+        self._index = None
+        self._bedrock = None
+        if "_query_cache" in vars(self):
+            self._query_cache._lock = threading.Lock()
+        if self._embedding_cache is not None:
+            self._embedding_cache.reset_after_fork()
+
+    def _get_embedding(self, text: str) -> np.ndarray:
         """
         Get embedding for text using AWS Bedrock Titan.
 
@@ -72,22 +270,65 @@ class PineconeRAG:
             text: Text to embed
 
         Returns:
-            Embedding vector
+            float32 embedding vector
         """
+        cache_key = None
+        if self._embedding_cache is not None:
+            cache_key = hashlib.sha256(f"{self.EMBEDDING_MODEL_ID}\n{text}".encode()).digest()
+            cached = self._embedding_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
         try:
             bedrock = self._get_bedrock()
             response = bedrock.invoke_model(
-                modelId="amazon.titan-embed-text-v1",
-                body=json.dumps({"inputText": text}),
+                modelId=self.EMBEDDING_MODEL_ID,
+                body=_json_dumps({"inputText": text}),
                 contentType="application/json",
                 accept="application/json"
             )
-            result = json.loads(response["body"].read())
-            return result["embedding"]
+            result = _json_loads(response["body"].read())
+            embedding = np.asarray(result["embedding"], dtype=np.float32)
         except Exception as e:
             logger.error(f"Embedding error: {e}")
-            # Return zero vector as fallback
-            return [0.0] * self.dimension
+            # Return zero vector as fallback (never cached)
+            return np.zeros(self.dimension, dtype=np.float32)
+
+        if cache_key is not None:
+            self._embedding_cache.set(cache_key, embedding)
+        return embedding
+
+    @staticmethod
+    def _wire_values(embedding: np.ndarray) -> List[float]:
+        """
+        Convert an embedding to the plain list the Pinecone SDK sends as JSON.
+
+        Rounding to 6 decimals halves the JSON text per vector (float32
+        values otherwise serialize as ~19-digit doubles) while leaving
+        cosine similarity unchanged to within 1e-7.
+        """
+        return np.round(embedding.astype(np.float64), 6).tolist()
+
+    def _get_embeddings_batch(self, texts: List[str], max_workers: int = 16) -> List[np.ndarray]:
+        """
+        Embed many texts concurrently.
+
+        Titan takes one input per call, so requests are fanned out over a
+        thread pool to overlap their round-trips.
+
+        Args:
+            texts: Texts to embed
+            max_workers: Concurrent Bedrock requests
+
+        Returns:
+            Embedding vectors in input order
+        """
+        if not texts:
+            return []
+        # Create the (thread-safe) boto3 client once before fanning out
+        self._get_bedrock()
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(texts))) as executor:
+            return list(executor.map(self._get_embedding, texts))
 
     def initialize_index(self) -> bool:
         """
@@ -96,15 +337,18 @@ class PineconeRAG:
         Returns:
             True if successful
         """
+        if self._index is not None:
+            return True
+
         try:
             pc = self._get_pinecone()
             if pc is None:
                 return False
 
-            # Check if index exists
-            existing_indexes = pc.list_indexes().names()
-
-            if self.index_name not in existing_indexes:
+            # Check this one index rather than listing all of them
+            try:
+                pc.describe_index(self.index_name)
+            except NotFoundException:
                 logger.info(f"Creating Pinecone index: {self.index_name}")
                 pc.create_index(
                     name=self.index_name,
@@ -116,7 +360,8 @@ class PineconeRAG:
                     )
                 )
 
-            self._index = pc.Index(self.index_name)
+            # pool_threads backs the async_req=True upserts used when seeding
+            self._index = pc.Index(self.index_name, pool_threads=30)
             logger.info(f"Connected to Pinecone index: {self.index_name}")
             return True
 
@@ -128,6 +373,10 @@ class PineconeRAG:
         """
         Seed the index with medical knowledge base.
 
+        Uses the embeddings file named by AHN_PREBUILT_EMB (see
+        scripts/build_medical_embeddings.py) when it matches the current
+        knowledge base, otherwise embeds every fact with Bedrock.
+
         Returns:
             Number of vectors upserted
         """
@@ -135,33 +384,89 @@ class PineconeRAG:
             if not self.initialize_index():
                 return 0
 
-        vectors = []
-        for i, (topic, facts) in enumerate(self.medical_knowledge.items()):
-            for j, fact in enumerate(facts):
-                vector_id = f"{topic}_{j}"
-                embedding = self._get_embedding(fact)
-                vectors.append({
-                    "id": vector_id,
-                    "values": embedding,
-                    "metadata": {
-                        "topic": topic,
-                        "content": fact,
-                        "type": "medical_fact"
-                    }
-                })
-
-        # Upsert in batches
-        batch_size = 100
-        total_upserted = 0
-
-        for i in range(0, len(vectors), batch_size):
-            batch = vectors[i:i + batch_size]
-            self._index.upsert(vectors=batch)
-            total_upserted += len(batch)
+        entries = self._flat_knowledge
+        embeddings = self._load_prebuilt_embeddings(entries)
+        if embeddings is None:
+            embeddings = self._get_embeddings_batch([fact for _, _, fact in entries])
+
+        vectors = [
+            {
+                "id": vector_id,
+                "values": self._wire_values(embedding),
+                "metadata": {
+                    "topic": topic,
+                    "content": fact,
+                    "type": "medical_fact"
+                }
+            }
+            for (vector_id, topic, fact), embedding in zip(entries, embeddings)
+        ]
+
+        # Upsert batches concurrently, then wait for every request
+        batch_size = 64
+        async_results = [
+            self._index.upsert(vectors=vectors[i:i + batch_size], async_req=True)
+            for i in range(0, len(vectors), batch_size)
+        ]
+        for result in async_results:
+            result.get()
+        total_upserted = len(vectors)
+
+        # Results cached before the reseed may no longer match the index
+        if "_query_cache" in vars(self):
+            self._query_cache.clear()
 
         logger.info(f"Seeded {total_upserted} medical knowledge vectors")
         return total_upserted
 
+    @property
+    def knowledge_version(self) -> str:
+        """Hash of the embedding model and knowledge base, used to version prebuilt embeddings"""
+        payload = json.dumps([self.EMBEDDING_MODEL_ID, self.medical_knowledge], sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def export_embeddings(self, path: str) -> int:
+        """
+        Embed the knowledge base and write it to a .npz file that
+        seed_medical_knowledge can load instead of calling Bedrock.
+
+        Args:
+            path: Output file
+
+        Returns:
+            Number of vectors written
+        """
+        entries = self._flat_knowledge
+        vectors = np.stack(self._get_embeddings_batch([fact for _, _, fact in entries]))
+        if not vectors.any(axis=1).all():
+            raise RuntimeError("Bedrock embedding failed for some facts; not writing prebuilt embeddings")
+        ids, topics, contents = (np.array(column) for column in zip(*entries))
+        np.savez(
+            path, version=np.array(self.knowledge_version),
+            ids=ids, topics=topics, contents=contents, vectors=vectors
+        )
+        return len(entries)
+
+    def _load_prebuilt_embeddings(self, entries: List[tuple]) -> Optional[List[np.ndarray]]:
+        """Load embeddings from $AHN_PREBUILT_EMB if it matches the current knowledge base"""
+        path = os.getenv("AHN_PREBUILT_EMB")
+        if not path:
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if str(data["version"]) != self.knowledge_version:
+                    logger.warning(f"Prebuilt embeddings in {path} are stale; embedding with Bedrock")
+                    return None
+                if data["ids"].tolist() != [vector_id for vector_id, _, _ in entries]:
+                    logger.warning(f"Prebuilt embeddings in {path} do not match the knowledge base")
+                    return None
+                vectors = data["vectors"].astype(np.float32)
+        except (OSError, KeyError, ValueError) as e:
+            logger.warning(f"Could not load prebuilt embeddings from {path}: {e}")
+            return None
+        logger.info(f"Loaded {len(vectors)} prebuilt embeddings from {path}")
+        return list(vectors)
+
     def retrieve(
         self,
         query: str,
@@ -186,14 +491,19 @@ class PineconeRAG:
         try:
             query_embedding = self._get_embedding(query)
 
+            if filter_dict is None:
+                cached = self._query_cache.get(query_embedding, top_k)
+                if cached is not None:
+                    return cached
+
             results = self._index.query(
-                vector=query_embedding,
+                vector=self._wire_values(query_embedding),
                 top_k=top_k,
                 include_metadata=True,
                 filter=filter_dict
             )
 
-            return [
+            matches = [
                 {
                     "id": match.id,
                     "score": match.score,
@@ -203,10 +513,46 @@ class PineconeRAG:
                 for match in results.matches
             ]
 
+            if filter_dict is None:
+                self._query_cache.add(query_embedding, top_k, matches)
+            return matches
+
         except Exception as e:
             logger.error(f"Pinecone query error: {e}")
             return self._fallback_retrieve(query, top_k)
 
+    def retrieve_batch(
+        self,
+        queries: List[str],
+        top_k: int = 5,
+        filter_dict: Optional[Dict[str, Any]] = None,
+        max_workers: int = 8
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Retrieve knowledge for several queries at once, e.g. one per symptom.
+
+        Pinecone has no multi-vector query, so each query's embedding and
+        search run on a thread pool to overlap their round-trips.
+
+        Args:
+            queries: Search queries
+            top_k: Number of results per query
+            filter_dict: Optional metadata filters
+            max_workers: Concurrent queries
+
+        Returns:
+            One result list per query, in query order
+        """
+        if not queries:
+            return []
+        if self._index is None:
+            return [self._fallback_retrieve(query, top_k) for query in queries]
+
+        # Create the (thread-safe) boto3 client once before fanning out
+        self._get_bedrock()
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(queries))) as executor:
+            return list(executor.map(lambda q: self.retrieve(q, top_k, filter_dict), queries))
+
     def _fallback_retrieve(
         self,
         query: str,
@@ -218,30 +564,69 @@ class PineconeRAG:
         query_lower = query.lower()
         results = []
 
-        for topic, facts in self.medical_knowledge.items():
-            if topic in query_lower:
-                for fact in facts:
-                    results.append({
-                        "id": f"{topic}_fallback",
-                        "score": 0.8,
-                        "content": fact,
-                        "topic": topic
-                    })
-
-        # If no topic match, return general knowledge
+        # Topics in the order the query mentions them
+        for topic in dict.fromkeys(self._topic_re.findall(query_lower)):
+            for fact in self.medical_knowledge[topic]:
+                results.append({
+                    "id": f"{topic}_fallback",
+                    "score": 0.8,
+                    "content": fact,
+                    "topic": topic
+                })
+                if len(results) >= top_k:
+                    return results
+
+        # If no topic match, return facts sharing a word with the query
         if not results:
-            for topic, facts in self.medical_knowledge.items():
-                for fact in facts:
-                    if any(word in fact.lower() for word in query_lower.split()):
-                        results.append({
-                            "id": f"{topic}_keyword",
-                            "score": 0.5,
-                            "content": fact,
-                            "topic": topic
-                        })
+            query_tokens = set(_TOKEN_RE.findall(query_lower))
+            token_index = self._token_index
+            positions = set().union(*(token_index.get(t, ()) for t in query_tokens))
+            for position in sorted(positions)[:top_k]:
+                _, topic, fact = self._flat_knowledge[position]
+                results.append({
+                    "id": f"{topic}_keyword",
+                    "score": 0.5,
+                    "content": fact,
+                    "topic": topic
+                })
 
         return results[:top_k]
 
+    @cached_property
+    def _query_cache(self) -> _SemanticQueryCache:
+        """Near-duplicate query cache for unfiltered retrievals, allocated on first use"""
+        return _SemanticQueryCache(self.dimension, ttl=float(os.getenv("QUERY_CACHE_TTL", "600")))
+
+    @cached_property
+    def medical_knowledge(self) -> Dict[str, List[str]]:
+        """Medical knowledge base, built on first use"""
+        return self._load_medical_knowledge()
+
+    @cached_property
+    def _topic_re(self) -> "re.Pattern":
+        """One alternation over all topic names, so topic matching is a single scan"""
+        # Longest first so a topic that contains another still wins
+        topics = sorted(self.medical_knowledge, key=len, reverse=True)
+        return re.compile("|".join(map(re.escape, topics)))
+
+    @cached_property
+    def _flat_knowledge(self) -> List[tuple]:
+        """(vector_id, topic, fact) for every fact in the knowledge base, in order"""
+        return [
+            (f"{topic}_{j}", topic, fact)
+            for topic, facts in self.medical_knowledge.items()
+            for j, fact in enumerate(facts)
+        ]
+
+    @cached_property
+    def _token_index(self) -> Dict[str, set]:
+        """Lowercase word -> positions in _flat_knowledge, for _fallback_retrieve"""
+        token_index: Dict[str, set] = defaultdict(set)
+        for position, (_, _, fact) in enumerate(self._flat_knowledge):
+            for token in _TOKEN_RE.findall(fact.lower()):
+                token_index[token].add(position)
+        return token_index
+
     def _load_medical_knowledge(self) -> Dict[str, List[str]]:
         """Load comprehensive medical knowledge base"""
         return {
@@ -327,5 +712,22 @@ class PineconeRAG:
         }
 
 
-# Global instance
-pinecone_rag = PineconeRAG()
+# Live PineconeRAG instances, reset in forked children (e.g. gunicorn workers)
+_instances: "weakref.WeakSet[PineconeRAG]" = weakref.WeakSet()
+
+
+def _reset_clients_after_fork():
+    for rag in list(_instances):
+        rag._reset_clients()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_clients_after_fork)
+
+
+def __getattr__(name):
+    # The global instance is created on first access (PEP 562), not at import
+    if name == "pinecone_rag":
+        value = globals()["pinecone_rag"] = PineconeRAG()
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,33 @@
+"""
+Embed the medical knowledge base once and save it for seeding.
+
+Writes a .npz file (ids, topics, contents, float32 vectors and a version
+hash of the knowledge base). Point AHN_PREBUILT_EMB at it so
+PineconeRAG.seed_medical_knowledge upserts these vectors instead of
+calling Bedrock for every fact. Re-run after editing the knowledge base;
+stale files are ignored.
+
+Usage:
+    python scripts/build_medical_embeddings.py [output.npz]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.pinecone_client import PineconeRAG  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("output", nargs="?", default="medical_knowledge.npz", help="Output .npz path")
+    args = parser.parse_args()
+
+    rag = PineconeRAG()
+    count = rag.export_embeddings(args.output)
+    print(f"Wrote {count} embeddings to {args.output} (version {rag.knowledge_version[:12]})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""
+Create the MongoDB indexes PatientRepository relies on.
+
+Run once per deployment (or after adding an index) instead of on every
+application connect. The *_id indexes are unique, so the build fails on a
+collection that already contains duplicate IDs; those collections are
+reported and the exit status is non-zero.
+
+Usage:
+    python scripts/ensure_mongodb_indexes.py
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.mongodb_client import MongoDBClient  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database", default="health_navigator", help="Database name")
+    args = parser.parse_args()
+
+    client = MongoDBClient(database_name=args.database, create_indexes_on_connect=False)
+    if not client.connect():
+        sys.exit("Could not connect to MongoDB (check MONGODB_URI)")
+    ok = client.ensure_indexes()
+    client.close()
+    if not ok:
+        sys.exit("Some indexes could not be created; see the warnings above")
+    print(f"Indexes are up to date on {args.database}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,9 +4,10 @@ Integrates: LangGraph + Claude API + MongoDB + Streamlit
 """
 import os
 import logging
+import threading
+from functools import cache
 from typing import Dict, Any, TypedDict, Annotated, List
 from datetime import datetime
-import operator
 
 # Load environment variables FIRST (before importing clients)
 try:
@@ -26,19 +27,19 @@ try:
 except Exception:
     pass  # Not running in Streamlit context
 
-from langgraph.graph import StateGraph, END
+from langgraph.graph import StateGraph, START, END
 from langgraph.checkpoint.memory import MemorySaver
 
 # MongoDB client (required)
 from database.mongodb_client import patient_repo, mongo_client
 
-# Pinecone RAG (optional)
+# Pinecone RAG (optional); the global PineconeRAG is resolved where it is used
 try:
-    from database.pinecone_client import pinecone_rag
+    from database import pinecone_client
     PINECONE_AVAILABLE = True
 except Exception:
     PINECONE_AVAILABLE = False
-    pinecone_rag = None
+    pinecone_client = None
 
 # Claude API client (for AI-powered assessments)
 try:
@@ -52,6 +53,20 @@ logger = logging.getLogger(__name__)
 
 # ==================== State Definition ====================
 
+def _latest(_old: str, new: str) -> str:
+    """Reducer for fields that nodes running in the same step may both set"""
+    return new
+
+
+# Cap on the workflow message log kept in state
+_MAX_MESSAGES = 256
+
+
+def _append_bounded(old: List[Dict], new: List[Dict]) -> List[Dict]:
+    """Reducer that appends node messages, keeping only the most recent _MAX_MESSAGES"""
+    return (old + new)[-_MAX_MESSAGES:]
+
+
 class PatientState(TypedDict):
     """State that flows through the LangGraph workflow"""
     # Patient Info
@@ -63,9 +78,14 @@ class PatientState(TypedDict):
     current_medications: List[str]
     allergies: List[str]
 
+    # Derived once from primary_complaints in run_patient_assessment;
+    # nodes fall back to primary_complaints when these are absent
+    complaints_text: str    # ", "-joined, for summaries and prompts
+    complaints_lower: str   # " "-joined and lowercased, for keyword matching
+
     # Workflow State
-    messages: Annotated[List[Dict], operator.add]
-    current_stage: str
+    messages: Annotated[List[Dict], _append_bounded]
+    current_stage: Annotated[str, _latest]
 
     # Assessment Results
     initial_risk_level: str
@@ -82,8 +102,75 @@ class PatientState(TypedDict):
     timestamp: str
 
 
+# Result fields every assessment starts from. Only immutable defaults live
+# here; list fields and patient data are filled in per run.
+_EMPTY_ASSESSMENT_STATE = {
+    "current_stage": "started",
+    "initial_risk_level": "",
+    "clinical_risk_level": "",
+    "intake_summary": "",
+    "assessment_findings": "",
+    "care_level": "",
+    "patient_id": "",
+    "assessment_id": "",
+}
+
+
+# Risk keywords, matched as substrings of the lowercased complaints/history
+_HIGH_RISK_KEYWORDS = (
+    'chest pain', 'breathing difficulty', 'unconscious', 'severe pain',
+    'blood in stool', 'blood in urine', 'sudden weakness', 'slurred speech',
+    'worst headache', 'seizure', 'high fever', 'confusion'
+)
+_MEDIUM_RISK_KEYWORDS = (
+    'fever', 'persistent pain', 'headache', 'dizziness', 'nausea',
+    'fatigue', 'cough', 'shortness of breath', 'palpitations'
+)
+_HIGH_RISK_CONDITIONS = ('heart disease', 'diabetes', 'cancer', 'immunocompromised')
+
+# Intake summary layout, filled in per patient by intake_node
+_INTAKE_SUMMARY_TEMPLATE = """
+**Patient Information:**
+- **Name:** {name}
+- **Age:** {age} years old
+- **Assessment Date:** {assessment_date}
+
+**Chief Complaints:**
+The patient presents with the following primary symptoms: {complaints}.
+
+**Duration of Symptoms:**
+{duration}
+
+**Medical History:**
+{history}
+
+**Current Medications:**
+{medications}
+
+**Known Allergies:**
+{allergies}
+
+**Initial Triage Assessment:**
+Based on the reported symptoms and patient information, an initial triage assessment has been conducted. The patient's symptoms have been categorized and prioritized according to clinical urgency guidelines.
+"""
+
+
 # ==================== Node Functions ====================
 
+def _complaints_text(state: PatientState) -> str:
+    """Complaints joined for summaries and prompts"""
+    if "complaints_text" in state:
+        return state["complaints_text"]
+    return ', '.join(state.get("primary_complaints", []))
+
+
+def _complaints_lower(state: PatientState) -> str:
+    """Complaints joined and lowercased for keyword matching"""
+    if "complaints_lower" in state:
+        return state["complaints_lower"]
+    return ' '.join(state.get("primary_complaints", [])).lower()
+
+
 def intake_node(state: PatientState) -> Dict[str, Any]:
     """
     Initial intake - gather patient information and perform initial triage.
@@ -91,7 +178,7 @@ def intake_node(state: PatientState) -> Dict[str, Any]:
     """
     logger.info("=== INTAKE NODE ===")
 
-    complaints = state.get("primary_complaints", [])
+    complaints_text = _complaints_text(state)
     name = state.get("name", "Patient")
     age = state.get("age", 0)
     duration = state.get("symptom_duration", "Not specified")
@@ -103,37 +190,25 @@ def intake_node(state: PatientState) -> Dict[str, Any]:
     # When enabled, this section will retrieve relevant medical knowledge
     rag_context = []
 
-    # Build intake summary (clean version without fake RAG references)
-    intake_summary = f"""
-**Patient Information:**
-- **Name:** {name}
-- **Age:** {age} years old
-- **Assessment Date:** {datetime.now().strftime('%B %d, %Y at %I:%M %p')}
-
-**Chief Complaints:**
-The patient presents with the following primary symptoms: {', '.join(complaints) if complaints else 'No specific complaints reported'}.
-
-**Duration of Symptoms:**
-{duration if duration else 'Duration not specified by patient.'}
-
-**Medical History:**
-{', '.join(history) if history else 'No significant medical history reported.'}
-
-**Current Medications:**
-{', '.join(medications) if medications else 'No current medications reported.'}
-
-**Known Allergies:**
-{', '.join(allergies) if allergies else 'No known drug allergies (NKDA).'}
+    now = datetime.now()
 
-**Initial Triage Assessment:**
-Based on the reported symptoms and patient information, an initial triage assessment has been conducted. The patient's symptoms have been categorized and prioritized according to clinical urgency guidelines.
-"""
+    # Build intake summary (clean version without fake RAG references)
+    intake_summary = _INTAKE_SUMMARY_TEMPLATE.format(
+        name=name,
+        age=age,
+        assessment_date=now.strftime('%B %d, %Y at %I:%M %p'),
+        complaints=complaints_text or 'No specific complaints reported',
+        duration=duration if duration else 'Duration not specified by patient.',
+        history=', '.join(history) if history else 'No significant medical history reported.',
+        medications=', '.join(medications) if medications else 'No current medications reported.',
+        allergies=', '.join(allergies) if allergies else 'No known drug allergies (NKDA).',
+    )
 
     return {
         "intake_summary": intake_summary,
         "rag_context": rag_context,
         "current_stage": "intake_complete",
-        "messages": [{"role": "system", "content": "Intake completed", "timestamp": datetime.now().isoformat()}]
+        "messages": [{"role": "system", "content": "Intake completed", "timestamp": now.isoformat()}]
     }
 
 
@@ -143,31 +218,15 @@ def risk_assessment_node(state: PatientState) -> Dict[str, Any]:
     """
     logger.info("=== RISK ASSESSMENT NODE ===")
 
-    complaints = state.get("primary_complaints", [])
+    complaints_lower = _complaints_lower(state)
     history = state.get("medical_history", [])
     age = state.get("age", 0)
-    rag_context = state.get("rag_context", [])
-
-    # Risk keywords
-    high_risk_keywords = [
-        'chest pain', 'breathing difficulty', 'unconscious', 'severe pain',
-        'blood in stool', 'blood in urine', 'sudden weakness', 'slurred speech',
-        'worst headache', 'seizure', 'high fever', 'confusion'
-    ]
-    medium_risk_keywords = [
-        'fever', 'persistent pain', 'headache', 'dizziness', 'nausea',
-        'fatigue', 'cough', 'shortness of breath', 'palpitations'
-    ]
-
-    # Check symptoms against risk keywords
-    complaints_lower = ' '.join(complaints).lower()
-    history_lower = ' '.join(history).lower()
 
     # Determine risk level
-    if any(k in complaints_lower for k in high_risk_keywords):
+    if any(k in complaints_lower for k in _HIGH_RISK_KEYWORDS):
         risk_level = "High"
         care_level = "Emergency Care"
-    elif any(k in complaints_lower for k in medium_risk_keywords):
+    elif any(k in complaints_lower for k in _MEDIUM_RISK_KEYWORDS):
         risk_level = "Medium"
         care_level = "Primary Care"
     elif age > 65 or age < 5:
@@ -177,9 +236,10 @@ def risk_assessment_node(state: PatientState) -> Dict[str, Any]:
         risk_level = "Low"
         care_level = "Self-Care with Monitoring"
 
-    # Adjust for medical history
-    if any(k in history_lower for k in ['heart disease', 'diabetes', 'cancer', 'immunocompromised']):
-        if risk_level == "Low":
+    # Adjust for medical history (only ever raises Low to Medium)
+    if risk_level == "Low":
+        history_lower = ' '.join(history).lower()
+        if any(k in history_lower for k in _HIGH_RISK_CONDITIONS):
             risk_level = "Medium"
             care_level = "Primary Care"
 
@@ -198,7 +258,7 @@ def clinical_assessment_node(state: PatientState) -> Dict[str, Any]:
     """
     logger.info("=== CLINICAL ASSESSMENT NODE ===")
 
-    complaints = state.get("primary_complaints", [])
+    complaints_text = _complaints_text(state)
     name = state.get("name", "Patient")
     age = state.get("age", 0)
     duration = state.get("symptom_duration", "Not specified")
@@ -217,7 +277,7 @@ def clinical_assessment_node(state: PatientState) -> Dict[str, Any]:
 PATIENT INFORMATION:
 - Name: {name}
 - Age: {age} years old
-- Primary Symptoms: {', '.join(complaints) if complaints else 'Not specified'}
+- Primary Symptoms: {complaints_text or 'Not specified'}
 - Duration: {duration}
 - Medical History: {', '.join(history) if history else 'None reported'}
 - Initial Risk Level: {risk_level}
@@ -253,9 +313,9 @@ Keep your response professional, evidence-based, and remember this is for inform
 
         except Exception as e:
             logger.warning(f"Claude API error, using fallback: {e}")
-            assessment_findings = _build_fallback_assessment(complaints, risk_level, care_level, rag_context)
+            assessment_findings = _build_fallback_assessment(complaints_text, risk_level, care_level, rag_context)
     else:
-        assessment_findings = _build_fallback_assessment(complaints, risk_level, care_level, rag_context)
+        assessment_findings = _build_fallback_assessment(complaints_text, risk_level, care_level, rag_context)
 
     return {
         "assessment_findings": assessment_findings,
@@ -264,9 +324,9 @@ Keep your response professional, evidence-based, and remember this is for inform
     }
 
 
-def _build_fallback_assessment(complaints, risk_level, care_level, rag_context):
+def _build_fallback_assessment(complaints_text, risk_level, care_level, rag_context):
     """Build a fallback assessment when Claude API is not available"""
-    symptoms_text = ', '.join(complaints) if complaints else 'unspecified symptoms'
+    symptoms_text = complaints_text or 'unspecified symptoms'
 
     return f"""
 **Clinical Assessment Summary:**
@@ -300,17 +360,9 @@ The overall clinical picture suggests a need for {care_level.lower()} evaluation
 """
 
 
-def treatment_planning_node(state: PatientState) -> Dict[str, Any]:
-    """
-    Generate treatment recommendations based on assessment.
-    """
-    logger.info("=== TREATMENT PLANNING NODE ===")
-
-    risk_level = state.get("clinical_risk_level", "Medium")
-    care_level = state.get("care_level", "Primary Care")
-
-    # Build treatment recommendations
-    recommendations = [
+def _build_treatment_recommendations(risk_level: str) -> tuple:
+    """Treatment recommendations for a risk level"""
+    return (
         f"**Immediate Action:** Based on the {risk_level.lower()} risk assessment, {'seek immediate medical attention at the nearest emergency department' if risk_level == 'High' else 'schedule an appointment with your healthcare provider within 24-48 hours' if risk_level == 'Medium' else 'monitor symptoms and practice self-care measures at home'}.",
 
         "**Symptom Monitoring:** Keep a detailed log of symptoms including onset time, duration, severity (scale 1-10), and any factors that worsen or improve symptoms. This information will be valuable for your healthcare provider.",
@@ -324,10 +376,28 @@ def treatment_planning_node(state: PatientState) -> Dict[str, Any]:
         "**Follow-Up Care:** Schedule a follow-up appointment within 48-72 hours if symptoms persist or worsen. Bring this assessment report to your healthcare provider for reference and continuity of care.",
 
         "**Lifestyle Considerations:** Consider factors that may be contributing to symptoms such as stress levels, sleep quality, diet, and physical activity. Addressing these factors can support overall health and recovery."
-    ]
+    )
+
+
+# Recommendations depend only on the risk level, so build each level's once
+_TREATMENT_RECOMMENDATIONS = {
+    level: _build_treatment_recommendations(level) for level in ("High", "Medium", "Low")
+}
+
+
+def treatment_planning_node(state: PatientState) -> Dict[str, Any]:
+    """
+    Generate treatment recommendations based on assessment.
+    """
+    logger.info("=== TREATMENT PLANNING NODE ===")
+
+    risk_level = state.get("clinical_risk_level", "Medium")
+    care_level = state.get("care_level", "Primary Care")
+
+    recommendations = _TREATMENT_RECOMMENDATIONS.get(risk_level) or _build_treatment_recommendations(risk_level)
 
     return {
-        "treatment_recommendations": recommendations,
+        "treatment_recommendations": list(recommendations),
         "current_stage": "planning_complete",
         "messages": [{"role": "system", "content": "Treatment plan generated", "timestamp": datetime.now().isoformat()}]
     }
@@ -339,11 +409,19 @@ def save_to_database_node(state: PatientState) -> Dict[str, Any]:
     """
     logger.info("=== SAVE TO DATABASE NODE ===")
 
+    now = datetime.now()
+    timestamp = now.isoformat()
+
+    # Stays LOCAL unless the patient record is stored
+    patient_id = "LOCAL"
+
     try:
-        # Connect to MongoDB if not connected
-        mongo_client.connect()
+        # Let the startup connection finish rather than racing it
+        _ensure_initialized()
 
-        # Create patient record
+        # The repository connects on first use and reuses the connection.
+        # The patient is stored before the assessment so an assessment
+        # never references a patient that failed to save.
         patient_data = {
             "name": state.get("name", "Unknown"),
             "age": state.get("age", 0),
@@ -365,7 +443,7 @@ def save_to_database_node(state: PatientState) -> Dict[str, Any]:
             "assessment_findings": state.get("assessment_findings", ""),
             "treatment_recommendations": state.get("treatment_recommendations", []),
             "rag_context": state.get("rag_context", []),
-            "timestamp": datetime.now().isoformat()
+            "timestamp": timestamp
         }
         assessment_id = patient_repo.create_assessment(assessment_data)
 
@@ -375,24 +453,29 @@ def save_to_database_node(state: PatientState) -> Dict[str, Any]:
             "patient_id": patient_id,
             "assessment_id": assessment_id,
             "current_stage": "saved",
-            "messages": [{"role": "system", "content": f"Saved to database: {assessment_id}", "timestamp": datetime.now().isoformat()}]
+            "messages": [{"role": "system", "content": f"Saved to database: {assessment_id}", "timestamp": timestamp}]
         }
 
     except Exception as e:
         logger.warning(f"MongoDB save failed (non-critical): {e}")
         return {
-            "patient_id": "LOCAL",
-            "assessment_id": f"LOCAL-{datetime.now().strftime('%Y%m%d%H%M%S')}",
+            "patient_id": patient_id,
+            "assessment_id": f"LOCAL-{now.strftime('%Y%m%d%H%M%S')}",
             "current_stage": "saved_locally",
-            "messages": [{"role": "system", "content": "Saved locally (MongoDB unavailable)", "timestamp": datetime.now().isoformat()}]
+            "messages": [{"role": "system", "content": "Saved locally (MongoDB unavailable)", "timestamp": timestamp}]
         }
 
 
 # ==================== Build LangGraph Workflow ====================
 
-def build_health_navigator_graph() -> StateGraph:
+def build_health_navigator_graph(checkpoint: bool = False) -> StateGraph:
     """
     Build the LangGraph workflow for health navigation.
+
+    Args:
+        checkpoint: Compile with an in-memory checkpointer, for debugging
+            or replaying runs. Assessments are one-shot and never resumed,
+            so it is off by default.
     """
     # Create the graph
     workflow = StateGraph(PatientState)
@@ -404,22 +487,28 @@ def build_health_navigator_graph() -> StateGraph:
     workflow.add_node("treatment_planning", treatment_planning_node)
     workflow.add_node("save_to_database", save_to_database_node)
 
-    # Define edges (workflow flow)
-    workflow.set_entry_point("intake")
-    workflow.add_edge("intake", "risk_assessment")
-    workflow.add_edge("risk_assessment", "clinical_assessment")
-    workflow.add_edge("clinical_assessment", "treatment_planning")
-    workflow.add_edge("treatment_planning", "save_to_database")
+    # Define edges (workflow flow). Nodes only wait on the nodes whose
+    # output they read, so independent ones run in the same step:
+    #   intake + risk_assessment -> clinical_assessment + treatment_planning -> save
+    workflow.add_edge(START, "intake")
+    workflow.add_edge(START, "risk_assessment")
+    workflow.add_edge(["intake", "risk_assessment"], "clinical_assessment")
+    workflow.add_edge("risk_assessment", "treatment_planning")
+    workflow.add_edge(["clinical_assessment", "treatment_planning"], "save_to_database")
     workflow.add_edge("save_to_database", END)
 
-    # Compile with memory checkpointer
-    memory = MemorySaver()
-    return workflow.compile(checkpointer=memory)
+    return workflow.compile(checkpointer=MemorySaver() if checkpoint else None)
+
+
+@cache
+def get_health_navigator_graph():
+    """Compiled workflow, built once per process and shared by every run"""
+    return build_health_navigator_graph()
 
 
 # ==================== Main Function for Streamlit ====================
 
-def run_patient_assessment(patient_data: Dict[str, Any]) -> Dict[str, Any]:
+def run_patient_assessment(patient_data: Dict[str, Any], debug: bool = False) -> Dict[str, Any]:
     """
     Run the full patient assessment workflow.
 
@@ -432,70 +521,70 @@ def run_patient_assessment(patient_data: Dict[str, Any]) -> Dict[str, Any]:
             - medical_history: List of medical conditions
             - current_medications: List of medications
             - allergies: List of allergies
+        debug: Stream the workflow to log each node's output keys
 
     Returns:
         Dictionary containing assessment results
     """
     logger.info("=== STARTING LANGGRAPH HEALTH ASSESSMENT ===")
 
-    # Initialize the graph
-    graph = build_health_navigator_graph()
+    # Get the shared compiled graph
+    graph = get_health_navigator_graph()
+
+    complaints = patient_data.get("primary_complaints", [])
 
     # Prepare initial state
     initial_state: PatientState = {
+        **_EMPTY_ASSESSMENT_STATE,
         "name": patient_data.get("name", "Patient"),
         "age": patient_data.get("age", 0),
-        "primary_complaints": patient_data.get("primary_complaints", []),
+        "primary_complaints": complaints,
+        "complaints_text": ', '.join(complaints),
+        "complaints_lower": ' '.join(complaints).lower(),
         "symptom_duration": patient_data.get("symptom_duration", ""),
         "medical_history": patient_data.get("medical_history", []),
         "current_medications": patient_data.get("current_medications", []),
         "allergies": patient_data.get("allergies", []),
         "messages": [],
-        "current_stage": "started",
-        "initial_risk_level": "",
-        "clinical_risk_level": "",
-        "intake_summary": "",
-        "assessment_findings": "",
         "treatment_recommendations": [],
-        "care_level": "",
         "rag_context": [],
-        "patient_id": "",
-        "assessment_id": "",
         "timestamp": datetime.now().isoformat()
     }
 
     # Run the workflow
-    config = {"configurable": {"thread_id": f"assessment-{datetime.now().strftime('%Y%m%d%H%M%S')}"}}
-
     try:
-        # Execute the graph and accumulate all state updates
-        accumulated_state = dict(initial_state)
-
-        for state_update in graph.stream(initial_state, config):
-            # Each state_update is {node_name: {updated_fields}}
-            for node_name, node_output in state_update.items():
-                logger.info(f"Node '{node_name}' completed with keys: {list(node_output.keys())}")
-                # Merge node output into accumulated state
-                for key, value in node_output.items():
-                    if value:  # Only update if value is not empty
-                        accumulated_state[key] = value
-
-        logger.info(f"Workflow completed. Risk: {accumulated_state.get('initial_risk_level')}, Care: {accumulated_state.get('care_level')}")
-
-        # Return the accumulated result
+        if debug:
+            # Per-node updates are only needed for logging; the last
+            # "values" chunk is the final state
+            final_state = initial_state
+            for mode, chunk in graph.stream(initial_state, stream_mode=["updates", "values"]):
+                if mode == "updates":
+                    for node_name, node_output in chunk.items():
+                        logger.info("Node '%s' completed with keys: %s", node_name, node_output.keys())
+                else:
+                    final_state = chunk
+        else:
+            final_state = graph.invoke(initial_state)
+
+        logger.info(
+            "Workflow completed. Risk: %s, Care: %s",
+            final_state.get('initial_risk_level'), final_state.get('care_level')
+        )
+
+        # Return the final workflow state
         return {
             "patient_name": patient_data.get("name", "Patient"),
             "patient_age": patient_data.get("age", 0),
             "assessment_date": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            "initial_risk_level": accumulated_state.get("initial_risk_level") or "Medium",
-            "clinical_risk_level": accumulated_state.get("clinical_risk_level") or "Medium",
-            "intake_summary": accumulated_state.get("intake_summary") or "",
-            "assessment_findings": accumulated_state.get("assessment_findings") or "",
-            "treatment_recommendations": accumulated_state.get("treatment_recommendations") or [],
-            "care_level": accumulated_state.get("care_level") or "Primary Care",
-            "rag_context": accumulated_state.get("rag_context") or [],
-            "patient_id": accumulated_state.get("patient_id") or "",
-            "assessment_id": accumulated_state.get("assessment_id") or "",
+            "initial_risk_level": final_state.get("initial_risk_level") or "Medium",
+            "clinical_risk_level": final_state.get("clinical_risk_level") or "Medium",
+            "intake_summary": final_state.get("intake_summary") or "",
+            "assessment_findings": final_state.get("assessment_findings") or "",
+            "treatment_recommendations": final_state.get("treatment_recommendations") or [],
+            "care_level": final_state.get("care_level") or "Primary Care",
+            "rag_context": final_state.get("rag_context") or [],
+            "patient_id": final_state.get("patient_id") or "",
+            "assessment_id": final_state.get("assessment_id") or "",
             "workflow_completed": True
         }
 
@@ -509,9 +598,9 @@ def run_patient_assessment(patient_data: Dict[str, Any]) -> Dict[str, Any]:
 def initialize_services():
     """Initialize MongoDB and optionally Pinecone connections"""
     # Initialize Pinecone RAG (optional)
-    if PINECONE_AVAILABLE and pinecone_rag:
+    if PINECONE_AVAILABLE and os.getenv("PINECONE_API_KEY"):
         try:
-            pinecone_rag.initialize_index()
+            pinecone_client.pinecone_rag.initialize_index()
             logger.info("Pinecone RAG initialized")
         except Exception as e:
             logger.warning(f"Pinecone initialization failed (RAG disabled): {e}")
@@ -532,5 +621,12 @@ def initialize_services():
         logger.warning("Claude API not available - using fallback assessments")
 
 
-# Initialize on module load
-initialize_services()
+def _ensure_initialized():
+    """Wait for the background initialize_services() started at import"""
+    _init_thread.join()
+
+
+# Initialize in the background so importing this module does not block on
+# Pinecone/MongoDB; save_to_database_node waits for it before writing
+_init_thread = threading.Thread(target=initialize_services, name="initialize-services", daemon=True)
+_init_thread.start()
@@ -0,0 +1,95 @@
+"""
+Shared pytest fixtures
+"""
+import os
+import pathlib
+import sys
+import pytest
+from types import MappingProxyType, SimpleNamespace
+from unittest.mock import MagicMock
+
+# Add project root to path once for every test module
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+
+@pytest.fixture(scope="session")
+def mock_mongo_client():
+    """Create one mock MongoDB client for the whole session"""
+    mock = MagicMock()
+    mock.get_collection.return_value = MagicMock()
+    return mock
+
+
+@pytest.fixture
+def _reset_mocks(mock_mongo_client):
+    """Clear calls and configuration the previous test left on the shared client"""
+    collection = mock_mongo_client.get_collection.return_value
+    mock_mongo_client.reset_mock(return_value=False, side_effect=True)
+    collection.reset_mock(return_value=True, side_effect=True)
+
+
+@pytest.fixture
+def patient_repo(mock_mongo_client, _reset_mocks):
+    """Create a PatientRepository backed by the shared mock client"""
+    from database.mongodb_client import PatientRepository
+    return PatientRepository(mock_mongo_client)
+
+
+@pytest.fixture(scope="session")
+def sample_patient():
+    """Read-only patient intake shared by the end-to-end tests"""
+    return MappingProxyType({
+        "patient_id": "TEST001",
+        "name": "Test Patient",
+        "age": 30,
+        "contact_info": "test@example.com",
+        "emergency_contact": "EC: 555-0000",
+        "primary_complaints": ["cough", "fever"],
+    })
+
+
+@pytest.fixture(scope="session")
+def assessment_result(tmp_path_factory, sample_patient):
+    """Run the full assessment workflow once and share the result"""
+    from streamlit_langgraph import run_patient_assessment
+
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("run"))
+    try:
+        yield run_patient_assessment(sample_patient)
+    finally:
+        os.chdir(cwd)
+
+
+class _StubCollection:
+    """Collection stand-in that appends inserted documents to a list"""
+
+    def __init__(self, captured):
+        self.captured = captured
+
+    def insert_one(self, doc):
+        self.captured.append(doc)
+        return SimpleNamespace(inserted_id="test_id")
+
+
+class _StubMongoClient:
+    """MongoDB client stand-in that hands out one stub collection"""
+
+    def __init__(self, captured):
+        self.coll = _StubCollection(captured)
+
+    def get_collection(self, *_):
+        return self.coll
+
+
+@pytest.fixture
+def captured():
+    """Documents inserted through stub_repo, oldest first"""
+    return []
+
+
+@pytest.fixture
+def stub_repo(captured):
+    """Create a PatientRepository over plain stubs for insert-only tests"""
+    from database.mongodb_client import PatientRepository
+    return PatientRepository(_StubMongoClient(captured))
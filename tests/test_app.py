@@ -4,11 +4,6 @@ Tests for the AI Health Navigator Streamlit app
 import pytest
 from unittest.mock import patch, MagicMock
 from io import BytesIO
-import sys
-import os
-
-# Add project root to path
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 
 class TestRunAssessment:
@@ -117,6 +112,32 @@ class TestPDFGeneration:
         assert pdf_content.startswith(b'%PDF')
         assert len(pdf_content) > 100
 
+    @pytest.mark.slow
+    def test_app_generate_pdf_handles_markup(self):
+        """Test app.generate_pdf escapes markup characters and still builds a PDF"""
+        # Imported outside `streamlit run`, app.py runs in Streamlit's bare mode
+        import app
+
+        assessment = {
+            "risk_level": "High",
+            "care_level": "Emergency <Care> & Co",
+            "symptoms": ["chest pain", "a < b", "x & y", "fever"],
+            "full_assessment": (
+                "## Findings & <Plan>\n\n"
+                "**Bold** text: if a<b then dose <5mg> & c > d\n"
+                "second *italic* line\n\n"
+                "- bullet **one** & <i>unclosed\n"
+                "1. numbered step\n"
+                "---\n"
+                "unmatched ** star <b>not a tag</b>"
+            ),
+        }
+
+        pdf_content = app.generate_pdf(assessment).getvalue()
+
+        assert pdf_content.startswith(b'%PDF')
+        assert pdf_content.rstrip().endswith(b'%%EOF')
+
 
 class TestRiskLevelParsing:
     """Tests for parsing risk levels from AI responses"""
@@ -3,31 +3,31 @@ Tests for MongoDB client
 """
 import pytest
 from datetime import datetime, timezone
-from unittest.mock import MagicMock, patch
-import sys
+from unittest.mock import AsyncMock, MagicMock, patch
 import os
 
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.mongodb_client import MongoDBClient
+
+
+@pytest.fixture(scope="module")
+def utc_now():
+    """Read the UTC clock once for the datetime tests"""
+    return datetime.now(timezone.utc)
 
 
 class TestDatetimeUsage:
     """Tests to verify timezone-aware datetime usage"""
 
-    def test_datetime_now_utc_returns_aware_datetime(self):
+    def test_datetime_now_utc_returns_aware_datetime(self, utc_now):
         """Test that datetime.now(timezone.utc) returns timezone-aware datetime"""
-        now = datetime.now(timezone.utc)
-
         # Should be timezone-aware
-        assert now.tzinfo is not None
-        assert now.tzinfo == timezone.utc
+        assert utc_now.tzinfo is not None
+        assert utc_now.tzinfo == timezone.utc
 
-    def test_datetime_comparison(self):
+    def test_datetime_comparison(self, utc_now):
         """Test that timezone-aware datetimes can be compared"""
-        time1 = datetime.now(timezone.utc)
-        time2 = datetime.now(timezone.utc)
-
-        # time2 should be >= time1
-        assert time2 >= time1
+        # A later reading should be >= the earlier one
+        assert datetime.now(timezone.utc) >= utc_now
 
 
 class TestMongoDBClientInit:
@@ -39,169 +39,418 @@ class TestMongoDBClientInit:
             # Remove MONGODB_URI if present
             os.environ.pop('MONGODB_URI', None)
 
-            from database.mongodb_client import MongoDBClient
             client = MongoDBClient()
 
             assert "mongodb://" in client.connection_string
 
     def test_custom_database_name(self):
         """Test custom database name"""
-        from database.mongodb_client import MongoDBClient
-
         client = MongoDBClient(database_name="test_db")
         assert client.database_name == "test_db"
 
+    def test_pool_options_from_env(self):
+        """Test pool options honour env overrides and explicit kwargs"""
+        with patch.dict(os.environ, {"MONGODB_MAX_POOL_SIZE": "50"}):
+            client = MongoDBClient(min_pool_size=0)
+
+            assert client.pool_options["maxPoolSize"] == 50
+            assert client.pool_options["minPoolSize"] == 0
+            assert client.pool_options["retryWrites"] is True
+            assert client.pool_options["compressors"] == "zlib"
+
+    def test_ensure_indexes_covers_every_collection(self):
+        """Test index creation runs per collection and tolerates failures"""
+        client = MongoDBClient()
+        client._db = MagicMock()
+        client._db["patients"].create_indexes.side_effect = Exception("not authorized")
+
+        assert client.ensure_indexes() is False
+
+        created = {c.args[0] for c in client._db.__getitem__.call_args_list}
+        assert {"patients", "assessments", "medication_reminders", "follow_up_schedules"} <= created
+
+    def test_connect_skips_index_build_by_default(self):
+        """Test indexes are only built on connect when explicitly enabled"""
+        with patch.dict(os.environ, {}, clear=True), \
+                patch("database.mongodb_client.MongoClient"), \
+                patch.object(MongoDBClient, "ensure_indexes") as ensure_indexes:
+            assert MongoDBClient().connect() is True
+            ensure_indexes.assert_not_called()
+
+            assert MongoDBClient(create_indexes_on_connect=True).connect() is True
+            ensure_indexes.assert_called_once()
+
+
+class TestCreateDocuments:
+    """Tests for the fields create_* methods add before inserting"""
+
+    @pytest.mark.parametrize("method,payload,check", [
+        pytest.param(
+            "create_patient", {"name": "Test Patient", "age": 30},
+            lambda d: "updated_at" in d and d["created_at"].tzinfo is not None,
+            id="patient_timestamps"),
+        pytest.param(
+            "create_assessment", {"patient_id": "PAT123", "symptoms": ["headache"]},
+            lambda d: "created_at" in d and d["assessment_id"].startswith("ASM"),
+            id="assessment_timestamp"),
+        pytest.param(
+            "create_session", {"patient_id": "PAT123"},
+            lambda d: d["messages"] == [] and d["session_id"].startswith("SES"),
+            id="session_messages_list"),
+        pytest.param(
+            "create_appointment", {"patient_id": "PAT123", "provider": "Dr. Smith"},
+            lambda d: d["status"] == "scheduled" and d["appointment_id"].startswith("APT"),
+            id="appointment_default_status"),
+        pytest.param(
+            "create_medication", {"patient_id": "PAT123", "name": "Aspirin", "dosage": "100mg"},
+            lambda d: d["is_active"] is True and d["medication_id"].startswith("MED"),
+            id="medication_default_active"),
+    ])
+    def test_insert_includes_fields(self, stub_repo, captured, method, payload, check):
+        """Test each create_* call inserts its ID, timestamps and defaults"""
+        getattr(stub_repo, method)(payload)
+
+        assert len(captured) == 1
+        assert check(captured[-1])
+
 
 class TestPatientRepository:
     """Tests for PatientRepository operations"""
 
-    @pytest.fixture
-    def mock_mongo_client(self):
-        """Create a mock MongoDB client"""
-        mock = MagicMock()
-        mock.get_collection.return_value = MagicMock()
-        return mock
+    def test_get_patient_cached_until_updated(self, patient_repo, mock_mongo_client):
+        """Test repeat point lookups hit the cache and updates invalidate it"""
+        mock_collection = MagicMock()
+        mock_collection.find_one.side_effect = lambda q: {
+            "_id": 1, "patient_id": "PAT123", "age": 30, "medical_history": ["asthma"]
+        }
+        mock_collection.update_one.return_value = MagicMock(modified_count=1)
+        mock_mongo_client.get_collection.return_value = mock_collection
 
-    def test_patient_data_includes_timestamps(self, mock_mongo_client):
-        """Test that patient creation includes created_at and updated_at"""
-        from database.mongodb_client import PatientRepository
+        first = patient_repo.get_patient("PAT123")
+        first["age"] = 99
+        first["medical_history"].append("diabetes")
+        cached = patient_repo.get_patient("PAT123")
+        assert cached["age"] == 30
+        assert cached["medical_history"] == ["asthma"]
+        assert mock_collection.find_one.call_count == 1
 
-        repo = PatientRepository(mock_mongo_client)
+        patient_repo.update_patient("PAT123", {"age": 31})
+        patient_repo.get_patient("PAT123")
+        assert mock_collection.find_one.call_count == 2
 
-        # Mock the insert
+    def test_list_queries_apply_field_projection(self, patient_repo, mock_mongo_client):
+        """Test the fields kwarg becomes a server-side projection"""
         mock_collection = MagicMock()
-        mock_collection.insert_one.return_value = MagicMock(inserted_id="test_id")
+        mock_collection.find.return_value.sort.return_value.limit.return_value = iter([])
         mock_mongo_client.get_collection.return_value = mock_collection
 
-        patient_data = {
-            "name": "Test Patient",
-            "age": 30
-        }
+        patient_repo.get_patient_assessments("PAT123", fields=["assessment_id", "clinical_risk_level"])
+        assert mock_collection.find.call_args[0][1] == {"assessment_id": 1, "clinical_risk_level": 1}
 
-        repo.create_patient(patient_data)
+        patient_repo.get_patient_assessments("PAT123")
+        assert mock_collection.find.call_args[0][1] is None
 
-        # Verify insert was called
-        call_args = mock_collection.insert_one.call_args[0][0]
+    def test_patient_dashboard_single_aggregate(self, patient_repo, mock_mongo_client):
+        """Test the dashboard splits one aggregation result into its sections"""
+        mock_collection = MagicMock()
+        mock_collection.aggregate.return_value = iter([{
+            "_id": 1,
+            "patient_id": "PAT123",
+            "assessments": [{"_id": 2, "assessment_id": "ASM1"}],
+            "medications": [],
+            "appointments": [{"_id": 3, "appointment_id": "APT1"}],
+        }])
+        mock_mongo_client.get_collection.return_value = mock_collection
 
-        assert "created_at" in call_args
-        assert "updated_at" in call_args
-        # Verify the timestamps are timezone-aware
-        assert call_args["created_at"].tzinfo is not None
+        dashboard = patient_repo.get_patient_dashboard("PAT123")
 
-    def test_assessment_data_includes_timestamp(self, mock_mongo_client):
-        """Test that assessment creation includes created_at"""
-        from database.mongodb_client import PatientRepository
+        mock_collection.aggregate.assert_called_once()
+        mock_collection.find_one.assert_not_called()
+        assert dashboard["patient"] == {"_id": "1", "patient_id": "PAT123"}
+        assert dashboard["assessments"][0]["_id"] == "2"
+        assert dashboard["medications"] == []
+        assert dashboard["appointments"][0]["appointment_id"] == "APT1"
 
-        repo = PatientRepository(mock_mongo_client)
 
+class TestSessionOperations:
+    """Tests for session-related operations"""
+
+    def test_session_messages_keep_full_history(self, patient_repo, mock_mongo_client):
+        """Test each message gets its own numbered document instead of growing the session"""
         mock_collection = MagicMock()
-        mock_collection.insert_one.return_value = MagicMock(inserted_id="test_id")
+        mock_collection.find_one_and_update.return_value = {"message_count": 101}
         mock_mongo_client.get_collection.return_value = mock_collection
 
-        assessment_data = {
-            "patient_id": "PAT123",
-            "symptoms": ["headache"]
+        assert patient_repo.add_message_to_session("SES123", "user", "hello") is True
+
+        update = mock_collection.find_one_and_update.call_args[0][1]
+        assert "$push" not in update
+        assert update["$inc"] == {"message_count": 1}
+        message = mock_collection.insert_one.call_args[0][0]
+        assert message["session_id"] == "SES123"
+        assert message["seq"] == 101
+        assert message["content"] == "hello"
+
+    def test_message_to_unknown_session(self, patient_repo, mock_mongo_client):
+        """Test appends to a missing session are reported and not stored"""
+        mock_collection = MagicMock()
+        mock_collection.find_one_and_update.return_value = None
+        mock_mongo_client.get_collection.return_value = mock_collection
+
+        assert patient_repo.add_message_to_session("SES404", "user", "hello") is False
+        mock_collection.insert_one.assert_not_called()
+
+    def test_get_session_joins_recent_messages(self, patient_repo, mock_mongo_client):
+        """Test messages_limit returns the newest messages, oldest first"""
+        mock_collection = MagicMock()
+        mock_collection.find_one.return_value = {
+            "_id": "1", "session_id": "SES123", "messages": [{"content": "legacy"}]
         }
+        cursor = mock_collection.find.return_value.sort.return_value
+        cursor.limit.return_value = iter([{"seq": 3}, {"seq": 2}])
+        mock_mongo_client.get_collection.return_value = mock_collection
 
-        repo.create_assessment(assessment_data)
+        session = patient_repo.get_session("SES123", messages_limit=2)
 
-        call_args = mock_collection.insert_one.call_args[0][0]
+        assert mock_collection.find_one.call_args[0][1] == {"messages": {"$slice": -2}}
+        cursor.limit.assert_called_once_with(2)
+        assert session["messages"] == [{"seq": 2}, {"seq": 3}]
 
-        assert "created_at" in call_args
-        assert "assessment_id" in call_args
-        assert call_args["assessment_id"].startswith("ASM")
+    def test_chat_appends_unacknowledged_on_request(self, patient_repo, mock_mongo_client):
+        """Test w=0 is opt-in for chat appends and reports an unknown outcome"""
+        from pymongo.write_concern import WriteConcern
 
+        mock_collection = MagicMock()
+        mock_collection.find_one_and_update.return_value = {"message_count": 1}
+        unacked = mock_collection.with_options.return_value
+        unacked.insert_one.return_value = MagicMock(acknowledged=False)
+        mock_mongo_client.get_collection.return_value = mock_collection
 
-class TestSessionOperations:
-    """Tests for session-related operations"""
+        assert patient_repo.add_message_to_session("SES123", "user", "hello", durable=False) is None
 
-    @pytest.fixture
-    def mock_mongo_client(self):
-        mock = MagicMock()
-        mock.get_collection.return_value = MagicMock()
-        return mock
+        mock_collection.with_options.assert_called_once_with(write_concern=WriteConcern(w=0))
+        mock_collection.insert_one.assert_not_called()
+        assert unacked.insert_one.call_count == 1
 
-    def test_session_creation_includes_messages_list(self, mock_mongo_client):
-        """Test that session creation includes empty messages list"""
-        from database.mongodb_client import PatientRepository
+    def test_session_state_writes_are_acknowledged(self, patient_repo, mock_mongo_client):
+        """Test state updates use the default write concern and report missing sessions"""
+        mock_collection = MagicMock()
+        mock_collection.update_one.return_value = MagicMock(acknowledged=True, modified_count=0)
+        mock_mongo_client.get_collection.return_value = mock_collection
+
+        assert patient_repo.update_session_state("SES404", {"stage": "intake"}) is False
 
-        repo = PatientRepository(mock_mongo_client)
+        mock_collection.with_options.assert_not_called()
+        mock_collection.update_one.assert_called_once()
 
+    def test_upsert_session_state_single_round_trip(self, patient_repo, mock_mongo_client):
+        """Test state upserts write and return in one acknowledged call"""
         mock_collection = MagicMock()
-        mock_collection.insert_one.return_value = MagicMock(inserted_id="test_id")
+        mock_collection.find_one_and_update.return_value = {"state": {"stage": "triage"}}
         mock_mongo_client.get_collection.return_value = mock_collection
 
-        session_data = {"patient_id": "PAT123"}
+        assert patient_repo.upsert_session_state("SES123", {"stage": "triage"}) == {"stage": "triage"}
+
+        kwargs = mock_collection.find_one_and_update.call_args[1]
+        assert kwargs["upsert"] is True
+        mock_collection.find_one.assert_not_called()
 
-        repo.create_session(session_data)
 
-        call_args = mock_collection.insert_one.call_args[0][0]
+class TestMedicationOperations:
+    """Tests for medication operations"""
+
+    def test_patient_medications_can_stream(self, patient_repo, mock_mongo_client):
+        """Test as_iter returns a lazy generator over the cursor"""
+        import types
+
+        mock_collection = MagicMock()
+        mock_collection.find.return_value.sort.return_value.limit.return_value = iter([{"_id": 7, "name": "Aspirin"}])
+        mock_mongo_client.get_collection.return_value = mock_collection
 
-        assert "messages" in call_args
-        assert call_args["messages"] == []
-        assert call_args["session_id"].startswith("SES")
+        medications = patient_repo.get_patient_medications("PAT123", as_iter=True)
 
+        assert isinstance(medications, types.GeneratorType)
+        assert list(medications) == [{"_id": "7", "name": "Aspirin"}]
 
-class TestAppointmentOperations:
-    """Tests for appointment operations"""
+    def test_overdue_reminders_stream_raw_bson(self, patient_repo, mock_mongo_client):
+        """Test the overdue sweep reads through a RawBSONDocument codec"""
+        from bson.raw_bson import RawBSONDocument
 
-    @pytest.fixture
-    def mock_mongo_client(self):
-        mock = MagicMock()
-        mock.get_collection.return_value = MagicMock()
-        return mock
+        mock_collection = MagicMock()
+        raw = mock_collection.with_options.return_value
+        raw.find.return_value.sort.return_value = iter([RawBSONDocument(b"\x05\x00\x00\x00\x00")])
+        mock_mongo_client.get_collection.return_value = mock_collection
 
-    def test_appointment_default_status(self, mock_mongo_client):
-        """Test appointment creation with default status"""
-        from database.mongodb_client import PatientRepository
+        reminders = list(patient_repo.iter_overdue_reminders("PAT123"))
 
-        repo = PatientRepository(mock_mongo_client)
+        codec_options = mock_collection.with_options.call_args[1]["codec_options"]
+        assert codec_options.document_class is RawBSONDocument
+        assert raw.find.call_args[0][0]["patient_id"] == "PAT123"
+        assert len(reminders) == 1
 
+    def test_discontinue_medication_single_timestamp(self, patient_repo, mock_mongo_client):
+        """Test discontinued_at and updated_at come from one clock read"""
         mock_collection = MagicMock()
-        mock_collection.insert_one.return_value = MagicMock(inserted_id="test_id")
+        mock_collection.update_one.return_value = MagicMock(modified_count=1)
         mock_mongo_client.get_collection.return_value = mock_collection
 
-        appointment_data = {
+        assert patient_repo.discontinue_medication("MED123", "side effects") is True
+
+        updates = mock_collection.update_one.call_args[0][1]["$set"]
+        assert updates["discontinued_at"] is updates["updated_at"]
+        assert updates["updated_at"].tzinfo is not None
+
+    def test_generate_reminders_uses_single_insert_many(self, patient_repo, mock_mongo_client):
+        """Test reminder generation batches all doses into one insert"""
+        mock_collection = MagicMock()
+        mock_collection.find_one.return_value = {
+            "_id": "test_id",
+            "medication_id": "MED123",
             "patient_id": "PAT123",
-            "provider": "Dr. Smith"
+            "name": "Aspirin",
+            "is_active": True,
+            "specific_times": ["23:59"]
         }
+        mock_mongo_client.get_collection.return_value = mock_collection
 
-        repo.create_appointment(appointment_data)
+        reminder_ids = patient_repo.generate_reminders_for_medication("MED123", days=3)
 
-        call_args = mock_collection.insert_one.call_args[0][0]
+        mock_collection.insert_one.assert_not_called()
+        docs = mock_collection.insert_many.call_args[0][0]
 
-        assert call_args["status"] == "scheduled"
-        assert call_args["appointment_id"].startswith("APT")
+        assert len(docs) == len(reminder_ids) >= 2
+        assert [d["reminder_id"] for d in docs] == reminder_ids
+        assert all(d["status"] == "pending" and d["created_at"].tzinfo is not None for d in docs)
+        assert "bypass_document_validation" not in mock_collection.insert_many.call_args[1]
 
 
-class TestMedicationOperations:
-    """Tests for medication operations"""
+class TestFollowUpOperations:
+    """Tests for follow-up tracking operations"""
+
+    def test_assessment_chain_uses_single_aggregate(self, patient_repo, mock_mongo_client):
+        """Test the chain is resolved in one pipeline and ordered chronologically"""
+        mock_collection = MagicMock()
+        mock_collection.aggregate.return_value = iter([{
+            "_id": "child_oid",
+            "root": {
+                "_id": "root_oid",
+                "assessment_id": "ASM1",
+                "created_at": datetime(2024, 1, 1, tzinfo=timezone.utc),
+                "depth": 1
+            },
+            "follow_ups": [
+                {"_id": "c3", "assessment_id": "ASM3", "created_at": datetime(2024, 1, 3, tzinfo=timezone.utc)},
+                {"_id": "c2", "assessment_id": "ASM2", "created_at": datetime(2024, 1, 2, tzinfo=timezone.utc)},
+            ]
+        }])
+        mock_mongo_client.get_collection.return_value = mock_collection
+
+        chain = patient_repo.get_assessment_chain("ASM2")
+
+        mock_collection.find_one.assert_not_called()
+        mock_collection.aggregate.assert_called_once()
+        assert [a["assessment_id"] for a in chain] == ["ASM1", "ASM2", "ASM3"]
+        assert "depth" not in chain[0]
+
+    def test_assessment_chain_falls_back_to_bfs(self, patient_repo, mock_mongo_client):
+        """Test servers without $graphLookup get one $in query per level"""
+        from pymongo.errors import OperationFailure
 
-    @pytest.fixture
-    def mock_mongo_client(self):
-        mock = MagicMock()
-        mock.get_collection.return_value = MagicMock()
-        return mock
+        docs = {
+            "ASM1": {"_id": 1, "assessment_id": "ASM1", "created_at": datetime(2024, 1, 1, tzinfo=timezone.utc)},
+            "ASM2": {"_id": 2, "assessment_id": "ASM2", "parent_assessment_id": "ASM1",
+                     "created_at": datetime(2024, 1, 2, tzinfo=timezone.utc)},
+            "ASM3": {"_id": 3, "assessment_id": "ASM3", "parent_assessment_id": "ASM2",
+                     "created_at": datetime(2024, 1, 3, tzinfo=timezone.utc)},
+        }
 
-    def test_medication_default_active(self, mock_mongo_client):
-        """Test medication creation defaults to active"""
-        from database.mongodb_client import PatientRepository
+        def matches(doc, query):
+            if "$or" in query:
+                return any(matches(doc, q) for q in query["$or"])
+            if "assessment_id" in query:
+                return doc["assessment_id"] == query["assessment_id"]
+            return doc.get("parent_assessment_id") in query["parent_assessment_id"]["$in"]
 
-        repo = PatientRepository(mock_mongo_client)
+        def find_one(query, projection):
+            doc = docs.get(query["assessment_id"])
+            return doc and {k: v for k, v in doc.items() if projection.get(k)}
 
         mock_collection = MagicMock()
-        mock_collection.insert_one.return_value = MagicMock(inserted_id="test_id")
+        mock_collection.aggregate.side_effect = OperationFailure("Unrecognized pipeline stage name: '$graphLookup'")
+        mock_collection.find_one.side_effect = find_one
+        mock_collection.find.side_effect = lambda q: [dict(d) for d in docs.values() if matches(d, q)]
         mock_mongo_client.get_collection.return_value = mock_collection
 
-        medication_data = {
-            "patient_id": "PAT123",
-            "name": "Aspirin",
-            "dosage": "100mg"
-        }
+        chain = patient_repo.get_assessment_chain("ASM3")
+
+        assert [a["assessment_id"] for a in chain] == ["ASM1", "ASM2", "ASM3"]
+        assert chain[0]["created_at"] == docs["ASM1"]["created_at"]
+        assert mock_collection.find_one.call_count == 3
+        assert all(c[0][1] == {"_id": 0, "assessment_id": 1, "parent_assessment_id": 1}
+                   for c in mock_collection.find_one.call_args_list)
+        assert mock_collection.find.call_count == 3
+
+    def test_bulk_complete_follow_ups_single_round_trip(self, patient_repo, mock_mongo_client):
+        """Test batch completion issues one unordered bulk_write"""
+        mock_collection = MagicMock()
+        mock_collection.bulk_write.return_value = MagicMock(modified_count=2)
+        mock_mongo_client.get_collection.return_value = mock_collection
+
+        assert patient_repo.bulk_complete_follow_ups({}) == 0
+        assert patient_repo.bulk_complete_follow_ups({"FUS1": "ASM1", "FUS2": "ASM2"}) == 2
+
+        ops = mock_collection.bulk_write.call_args[0][0]
+        assert len(ops) == 2
+        assert mock_collection.bulk_write.call_args[1] == {"ordered": False}
+        mock_collection.update_one.assert_not_called()
+
+
+class TestAnalyticsOperations:
+    """Tests for analytics operations"""
+
+    def test_assessment_stats_counts_by_risk(self, patient_repo, mock_mongo_client):
+        """Test stats fold grouped counts into totals per risk level"""
+        mock_collection = MagicMock()
+        mock_collection.aggregate.return_value = iter([
+            {"_id": "HIGH", "count": 2},
+            {"_id": "LOW", "count": 5},
+        ])
+        mock_mongo_client.get_collection.return_value = mock_collection
+
+        stats = patient_repo.get_assessment_stats()
+
+        assert stats == {"total": 7, "by_risk": {"HIGH": 2, "LOW": 5}}
+
+
+class TestAsyncPatientRepository:
+    """Tests for the AsyncMongoClient-backed repository"""
+
+    def test_get_patient_awaits_find_one(self):
+        """Test async reads await the driver and stringify _id"""
+        import asyncio
+        from database.async_mongodb_client import AsyncPatientRepository
+
+        mock_client = MagicMock()
+        mock_collection = MagicMock()
+        mock_collection.find_one = AsyncMock(return_value={"_id": 42, "patient_id": "PAT123"})
+        mock_client.get_collection.return_value = mock_collection
+
+        repo = AsyncPatientRepository(mock_client)
+        patient = asyncio.run(repo.get_patient("PAT123"))
+
+        assert patient == {"_id": "42", "patient_id": "PAT123"}
+        mock_collection.find_one.assert_awaited_once_with({"patient_id": "PAT123"})
 
-        repo.create_medication(medication_data)
+    def test_async_client_shares_sync_options(self):
+        """Test the AsyncMongoClient gets the same pool and timeout settings"""
+        import asyncio
+        from database.async_mongodb_client import AsyncMongoDBClient
 
-        call_args = mock_collection.insert_one.call_args[0][0]
+        client = AsyncMongoDBClient(min_pool_size=0, max_pool_size=25)
+        client.get_collection("patients")
 
-        assert call_args["is_active"] is True
-        assert call_args["medication_id"].startswith("MED")
+        options = client._client.options
+        assert options.pool_options.min_pool_size == 0
+        assert options.pool_options.max_pool_size == 25
+        assert options.server_selection_timeout == 5
+        asyncio.run(client.close())
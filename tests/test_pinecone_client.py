@@ -0,0 +1,386 @@
+"""
+Tests for Pinecone RAG client
+"""
+import numpy as np
+import pytest
+from unittest.mock import MagicMock, patch
+import os
+
+# Pinecone is an optional dependency (commented out in requirements.txt)
+pytest.importorskip("pinecone")
+
+
+class TestLazyLoading:
+    """Tests for deferred knowledge base and global instance creation"""
+
+    def test_knowledge_base_built_on_first_use(self):
+        """Test constructing PineconeRAG does not build the knowledge base"""
+        from database.pinecone_client import PineconeRAG
+
+        rag = PineconeRAG(api_key=None)
+        assert "medical_knowledge" not in vars(rag)
+        assert "_query_cache" not in vars(rag)
+
+        assert rag.medical_knowledge is rag.medical_knowledge
+        assert "headache" in rag.medical_knowledge
+
+    def test_global_instance_created_on_access(self):
+        """Test the module-level pinecone_rag is created once, on access"""
+        import database.pinecone_client as module
+
+        first = module.pinecone_rag
+        assert isinstance(first, module.PineconeRAG)
+        assert module.pinecone_rag is first
+
+
+class TestInitializeIndex:
+    """Tests for index setup"""
+
+    def test_existing_index_not_recreated(self):
+        """Test an existing index is described, not listed or created"""
+        from database.pinecone_client import PineconeRAG
+
+        rag = PineconeRAG(api_key="test-key")
+        rag._pc = MagicMock()
+
+        assert rag.initialize_index() is True
+        assert rag.initialize_index() is True
+
+        rag._pc.describe_index.assert_called_once_with("medical-knowledge")
+        rag._pc.list_indexes.assert_not_called()
+        rag._pc.create_index.assert_not_called()
+        rag._pc.Index.assert_called_once()
+
+    def test_missing_index_created(self):
+        """Test a missing index is created before connecting"""
+        from pinecone import NotFoundException
+        from database.pinecone_client import PineconeRAG
+
+        rag = PineconeRAG(api_key="test-key")
+        rag._pc = MagicMock()
+        rag._pc.describe_index.side_effect = NotFoundException()
+
+        assert rag.initialize_index() is True
+        rag._pc.create_index.assert_called_once()
+        assert rag._index is rag._pc.Index.return_value
+
+
+class TestForkSafety:
+    """Tests for resetting clients in forked worker processes"""
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+    def test_clients_reset_in_forked_child(self):
+        """Test a forked child starts without the parent's Pinecone/Bedrock clients"""
+        from database.pinecone_client import PineconeRAG
+
+        rag = PineconeRAG(api_key="test-key")
+        rag._pc, rag._index, rag._bedrock = MagicMock(), MagicMock(), MagicMock()
+
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            cleared = rag._pc is None and rag._index is None and rag._bedrock is None
+            os.write(write_fd, b"1" if cleared else b"0")
+            os._exit(0)
+
+        os.close(write_fd)
+        assert os.read(read_fd, 1) == b"1"
+        os.waitpid(pid, 0)
+        os.close(read_fd)
+        assert rag._index is not None
+
+
+class TestSeeding:
+    """Tests for knowledge base seeding"""
+
+    def test_embeddings_batch_preserves_order(self):
+        """Test concurrent embedding returns vectors in input order"""
+        from database.pinecone_client import PineconeRAG
+
+        rag = PineconeRAG(api_key=None)
+
+        with patch.object(rag, "_get_bedrock"), \
+                patch.object(rag, "_get_embedding", side_effect=lambda t: np.array([len(t)], dtype=np.float32)):
+            embeddings = rag._get_embeddings_batch(["a", "bbb", "cc"])
+
+        assert [e.tolist() for e in embeddings] == [[1.0], [3.0], [2.0]]
+
+    def test_seed_upserts_every_fact(self):
+        """Test seeding embeds each fact once and upserts them all"""
+        from database.pinecone_client import PineconeRAG
+
+        rag = PineconeRAG(api_key=None)
+        rag._index = MagicMock()
+        total_facts = sum(len(f) for f in rag.medical_knowledge.values())
+
+        with patch.object(rag, "_get_embeddings_batch", side_effect=lambda texts: [np.zeros(2)] * len(texts)) as batch:
+            assert rag.seed_medical_knowledge() == total_facts
+
+        batch.assert_called_once()
+        assert all(call[1]["async_req"] is True for call in rag._index.upsert.call_args_list)
+        assert rag._index.upsert.return_value.get.call_count == rag._index.upsert.call_count
+        upserted = [v for call in rag._index.upsert.call_args_list for v in call[1]["vectors"]]
+        assert [v["id"] for v in upserted][:2] == ["headache_0", "headache_1"]
+        assert isinstance(upserted[0]["values"], list)
+        assert len(upserted) == total_facts
+
+    def test_seed_from_prebuilt_embeddings(self, tmp_path):
+        """Test a matching prebuilt embeddings file replaces Bedrock calls"""
+        from database.pinecone_client import PineconeRAG
+
+        path = str(tmp_path / "medical_knowledge.npz")
+        builder = PineconeRAG(api_key=None, dimension=2)
+        with patch.object(builder, "_get_embeddings_batch", side_effect=lambda texts: [np.ones(2)] * len(texts)):
+            total_facts = builder.export_embeddings(path)
+
+        rag = PineconeRAG(api_key=None, dimension=2)
+        rag._index = MagicMock()
+        with patch.dict(os.environ, {"AHN_PREBUILT_EMB": path}), \
+                patch.object(rag, "_get_embeddings_batch") as batch:
+            assert rag.seed_medical_knowledge() == total_facts
+
+        batch.assert_not_called()
+        upserted = [v for call in rag._index.upsert.call_args_list for v in call[1]["vectors"]]
+        assert upserted[0]["values"] == [1.0, 1.0]
+
+    def test_stale_prebuilt_embeddings_ignored(self, tmp_path):
+        """Test embeddings built from a different knowledge base fall back to Bedrock"""
+        from database.pinecone_client import PineconeRAG
+
+        path = str(tmp_path / "medical_knowledge.npz")
+        builder = PineconeRAG(api_key=None, dimension=2)
+        builder.medical_knowledge = {"headache": ["An outdated fact."]}
+        with patch.object(builder, "_get_embeddings_batch", side_effect=lambda texts: [np.ones(2)] * len(texts)):
+            builder.export_embeddings(path)
+
+        rag = PineconeRAG(api_key=None, dimension=2)
+        rag._index = MagicMock()
+        zeros = lambda texts: [np.zeros(2)] * len(texts)  # noqa: E731
+        with patch.dict(os.environ, {"AHN_PREBUILT_EMB": path}), \
+                patch.object(rag, "_get_embeddings_batch", side_effect=zeros) as batch:
+            rag.seed_medical_knowledge()
+
+        batch.assert_called_once()
+
+    def test_wire_values_are_short_and_close(self):
+        """Test vectors sent to Pinecone round-trip to near-identical cosine"""
+        import json
+        from database.pinecone_client import PineconeRAG
+
+        vec = np.random.default_rng(0).normal(0, 0.3, 1024).astype(np.float32)
+        wire = PineconeRAG._wire_values(vec)
+
+        assert len(json.dumps(wire)) < len(json.dumps(vec.tolist())) * 0.6
+        cosine = np.dot(vec, wire) / (np.linalg.norm(vec) * np.linalg.norm(wire))
+        assert cosine > 0.999999
+
+
+class TestEmbeddingCache:
+    """Tests for the embedding cache"""
+
+    def _bedrock_returning(self, embedding):
+        import io
+        import json
+        body = json.dumps({"embedding": embedding}).encode()
+        bedrock = MagicMock()
+        bedrock.invoke_model.side_effect = lambda **kw: {"body": io.BytesIO(body)}
+        return bedrock
+
+    def test_repeat_text_served_from_memory_and_disk(self, tmp_path):
+        """Test identical text hits Bedrock once, even across instances"""
+        from database.pinecone_client import PineconeRAG
+
+        with patch.dict(os.environ, {"EMBEDDING_CACHE_PATH": str(tmp_path / "emb.sqlite")}):
+            rag = PineconeRAG(api_key=None)
+            rag._bedrock = self._bedrock_returning([0.5, -0.25])
+
+            assert rag._get_embedding("chest pain").dtype == np.float32
+            assert rag._get_embedding("chest pain").tolist() == [0.5, -0.25]
+            assert rag._bedrock.invoke_model.call_count == 1
+
+            fresh = PineconeRAG(api_key=None)
+            fresh._bedrock = self._bedrock_returning([9.0, 9.0])
+            assert fresh._get_embedding("chest pain").tolist() == [0.5, -0.25]
+            fresh._bedrock.invoke_model.assert_not_called()
+
+    def test_disk_layer_is_opt_in(self, tmp_path, monkeypatch):
+        """Test no sqlite file is written unless EMBEDDING_CACHE_PATH is set"""
+        from database.pinecone_client import PineconeRAG
+
+        monkeypatch.delenv("EMBEDDING_CACHE_PATH", raising=False)
+        monkeypatch.setenv("HOME", str(tmp_path))
+        rag = PineconeRAG(api_key=None)
+        rag._bedrock = self._bedrock_returning([0.5, -0.25])
+
+        rag._get_embedding("chest pain")
+
+        assert rag._embedding_cache.path is None
+        assert list(tmp_path.iterdir()) == []
+
+    def test_failed_embedding_not_cached(self, tmp_path):
+        """Test the zero-vector fallback is never cached"""
+        from database.pinecone_client import PineconeRAG
+
+        with patch.dict(os.environ, {"EMBEDDING_CACHE_PATH": str(tmp_path / "emb.sqlite")}):
+            rag = PineconeRAG(api_key=None, dimension=2)
+            rag._bedrock = MagicMock()
+            rag._bedrock.invoke_model.side_effect = Exception("throttled")
+
+            assert rag._get_embedding("fever").tolist() == [0.0, 0.0]
+
+            rag._bedrock = self._bedrock_returning([1.0, 2.0])
+            assert rag._get_embedding("fever").tolist() == [1.0, 2.0]
+
+
+class TestSemanticQueryCache:
+    """Tests for the near-duplicate query cache"""
+
+    def _rag_with_index(self):
+        from database.pinecone_client import PineconeRAG
+
+        rag = PineconeRAG(api_key=None, dimension=2)
+        rag._index = MagicMock()
+        match = MagicMock(id="fever_0", score=0.9, metadata={"content": "Fever fact", "topic": "fever"})
+        rag._index.query.return_value.matches = [match]
+        return rag
+
+    def test_similar_query_reuses_results(self):
+        """Test a near-identical query embedding skips the Pinecone query"""
+        rag = self._rag_with_index()
+
+        with patch.object(rag, "_get_embedding", side_effect=np.array([[1.0, 0.0], [0.99, 0.05]], dtype=np.float32)):
+            first = rag.retrieve("high fever", top_k=1)
+            second = rag.retrieve("a high fever", top_k=1)
+
+        assert second == first
+        rag._index.query.assert_called_once()
+
+    def test_dissimilar_filtered_or_failed_queries_miss(self):
+        """Test the cache only serves unfiltered, similar, non-zero queries"""
+        rag = self._rag_with_index()
+        embeddings = np.array([[1, 0], [0, 1], [1, 0], [0, 0], [0, 0]], dtype=np.float32)
+
+        with patch.object(rag, "_get_embedding", side_effect=embeddings):
+            rag.retrieve("fever", top_k=1)
+            rag.retrieve("rash", top_k=1)
+            rag.retrieve("fever", top_k=1, filter_dict={"topic": "fever"})
+            rag.retrieve("???", top_k=1)
+            rag.retrieve("???", top_k=1)
+
+        assert rag._index.query.call_count == 5
+
+    def test_entries_expire_after_ttl(self):
+        """Test cached results stop matching once their TTL has passed"""
+        from database.pinecone_client import _SemanticQueryCache
+
+        cache = _SemanticQueryCache(dimension=2, ttl=60)
+        vec = np.array([1, 0], dtype=np.float32)
+
+        with patch("database.pinecone_client.time.monotonic", side_effect=[100.0, 130.0, 161.0, 161.0]):
+            cache.add(vec, 1, [{"id": "fever_0"}])
+            assert cache.get(vec, 1) == [{"id": "fever_0"}]
+            assert cache.get(vec, 1) is None
+            cache.add(np.array([0, 1], dtype=np.float32), 1, [{"id": "rash_0"}])
+
+        assert cache._entries[0] is None
+
+    def test_hit_skips_closer_entry_with_fewer_results(self):
+        """Test a near-duplicate cached with enough results answers a larger top_k"""
+        from database.pinecone_client import _SemanticQueryCache
+
+        cache = _SemanticQueryCache(dimension=2)
+        cache.add(np.array([1, 0.2], dtype=np.float32), 5, [{"id": f"fever_{i}"} for i in range(5)])
+        cache.add(np.array([1, 0], dtype=np.float32), 1, [{"id": "fever_0"}])
+
+        results = cache.get(np.array([1, 0], dtype=np.float32), 3)
+
+        assert [r["id"] for r in results] == ["fever_0", "fever_1", "fever_2"]
+
+    def test_reseed_clears_cache(self):
+        """Test seeding the index drops results cached from the old contents"""
+        rag = self._rag_with_index()
+        rag._query_cache.add(np.array([1, 0], dtype=np.float32), 1, [{"id": "fever_0"}])
+
+        with patch.object(rag, "_get_embeddings_batch", side_effect=lambda texts: [np.ones(2)] * len(texts)):
+            rag.seed_medical_knowledge()
+
+        assert rag._query_cache.get(np.array([1, 0], dtype=np.float32), 1) is None
+
+
+class TestRetrieveBatch:
+    """Tests for multi-query retrieval"""
+
+    def test_results_in_query_order(self):
+        """Test every query is searched and results line up with the queries"""
+        from database.pinecone_client import PineconeRAG
+
+        rag = PineconeRAG(api_key=None, dimension=2)
+        rag._index = MagicMock()
+        rag._index.query.side_effect = lambda vector, **kw: MagicMock(matches=[
+            MagicMock(id=str(vector), score=1.0, metadata={"content": "", "topic": ""})
+        ])
+        embeddings = {"fever": [1.0, 0.0], "rash": [0.0, 1.0], "cough": [0.6, 0.8]}
+
+        with patch.object(rag, "_get_bedrock"), \
+                patch.object(rag, "_get_embedding", side_effect=lambda q: np.array(embeddings[q])):
+            results = rag.retrieve_batch(["fever", "rash", "cough"], top_k=1)
+
+        assert [r[0]["id"] for r in results] == [str(v) for v in embeddings.values()]
+        assert rag._index.query.call_count == 3
+
+    def test_fallback_without_index(self):
+        """Test batch retrieval uses keyword fallback when Pinecone is not configured"""
+        from database.pinecone_client import PineconeRAG
+
+        rag = PineconeRAG(api_key=None)
+        results = rag.retrieve_batch(["headache", "diabetes"], top_k=2)
+
+        assert [r["topic"] for r in results[0]] == ["headache", "headache"]
+        assert [r["topic"] for r in results[1]] == ["diabetes", "diabetes"]
+
+
+class TestFallbackRetrieve:
+    """Tests for keyword retrieval when Pinecone is not configured"""
+
+    def test_topic_match(self):
+        """Test a topic named in the query returns that topic's facts"""
+        from database.pinecone_client import PineconeRAG
+
+        rag = PineconeRAG(api_key=None)
+        results = rag.retrieve("patient reports headache since morning", top_k=3)
+
+        assert len(results) == 3
+        assert all(r["topic"] == "headache" and r["score"] == 0.8 for r in results)
+
+    def test_multiple_topics_in_query_order(self):
+        """Test every topic named in the query contributes, first-mentioned first"""
+        from database.pinecone_client import PineconeRAG
+
+        rag = PineconeRAG(api_key=None)
+        results = rag.retrieve("dizziness and headaches", top_k=20)
+
+        topics = [r["topic"] for r in results]
+        assert topics == ["dizziness"] * 8 + ["headache"] * 7
+
+    def test_keyword_match(self):
+        """Test queries without a topic fall back to keyword matches"""
+        from database.pinecone_client import PineconeRAG
+
+        rag = PineconeRAG(api_key=None)
+        results = rag.retrieve("metformin", top_k=5)
+
+        assert results
+        assert all(r["score"] == 0.5 for r in results)
+        assert any("Metformin" in r["content"] for r in results)
+
+    def test_keyword_match_is_whole_word_in_kb_order(self):
+        """Test keyword matches use whole words and keep knowledge base order"""
+        from database.pinecone_client import PineconeRAG
+
+        rag = PineconeRAG(api_key=None)
+        results = rag.retrieve("any pallor?", top_k=5)
+
+        assert [r["content"] for r in results] == [
+            "Anemia symptoms: fatigue, dyspnea on exertion, pallor, tachycardia."
+        ]
+        assert rag.retrieve("zzz unknown", top_k=5) == []
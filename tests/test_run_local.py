@@ -1,29 +1,45 @@
-import os
-import sys
-import pathlib
-sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
-from streamlit_langgraph import run_patient_assessment
-
-SAMPLE_PATIENT = {
-    "patient_id": "TEST001",
-    "name": "Test Patient",
-    "age": 30,
-    "contact_info": "test@example.com",
-    "emergency_contact": "EC: 555-0000",
-    "primary_complaints": ["cough", "fever"],
-}
-
-
-
-def test_local_run_creates_pdf(tmp_path):
-    cwd = os.getcwd()
-    try:
-        os.chdir(tmp_path)
-        result = run_patient_assessment(SAMPLE_PATIENT)
-        # Check workflow completed successfully
-        assert result.get("workflow_completed") is True, f"Workflow not completed: {result}"
-        # Verify expected fields are present
-        assert result.get("care_level") is not None, "care_level should be set"
-        assert result.get("assessment_id") is not None, "assessment_id should be set"
-    finally:
-        os.chdir(cwd)
+import pytest
+from unittest.mock import patch
+
+
+@pytest.mark.slow
+def test_local_run_creates_pdf(assessment_result):
+    result = assessment_result
+    # Check workflow completed successfully
+    assert result.get("workflow_completed") is True, f"Workflow not completed: {result}"
+    # Verify expected fields are present
+    assert result.get("care_level") is not None, "care_level should be set"
+    assert result.get("assessment_id") is not None, "assessment_id should be set"
+
+
+def test_nodes_derive_complaints_when_missing():
+    from streamlit_langgraph import intake_node, risk_assessment_node
+
+    state = {"primary_complaints": ["Chest pain"], "age": 40, "medical_history": []}
+    assert risk_assessment_node(state)["initial_risk_level"] == "High"
+    assert "Chest pain" in intake_node(state)["intake_summary"]
+
+
+def test_save_skips_assessment_when_patient_insert_fails():
+    import streamlit_langgraph
+
+    with patch.object(streamlit_langgraph, "patient_repo") as repo:
+        repo.create_patient.side_effect = RuntimeError("insert failed")
+        result = streamlit_langgraph.save_to_database_node({"name": "Test"})
+
+    repo.create_assessment.assert_not_called()
+    assert result["patient_id"] == "LOCAL"
+    assert result["current_stage"] == "saved_locally"
+
+
+def test_save_reports_stored_patient_when_assessment_insert_fails():
+    import streamlit_langgraph
+
+    with patch.object(streamlit_langgraph, "patient_repo") as repo:
+        repo.create_patient.return_value = "PAT123"
+        repo.create_assessment.side_effect = RuntimeError("insert failed")
+        result = streamlit_langgraph.save_to_database_node({"name": "Test"})
+
+    assert repo.create_assessment.call_args[0][0]["patient_id"] == "PAT123"
+    assert result["patient_id"] == "PAT123"
+    assert result["assessment_id"].startswith("LOCAL-")